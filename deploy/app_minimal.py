@@ -18,34 +18,20 @@ print(f"项目目录: {project_root}")
 # 导入依赖
 from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
-from werkzeug.utils import secure_filename
+from mixer_web.handlers import register_routes
 
 print("✓ Flask 加载成功")
 
-# 延迟导入 Mixer（避免启动时崩溃）
-mixer = None
-
-
-def get_mixer():
-    global mixer
-    if mixer is None:
-        from mixer_core.mixer import Mixer
-
-        mixer = Mixer()
-        print("✓ Mixer 初始化成功")
-    return mixer
-
-
 # 创建 Flask 应用
 app = Flask(__name__)
 
 # 配置 - Render Plus 支持更大文件
 app.config["MAX_CONTENT_LENGTH"] = 100 * 1024 * 1024  # 100MB
-app.config["UPLOAD_FOLDER"] = "/tmp/music-mix-uploads"
-app.config["OUTPUT_FOLDER"] = "/tmp/music-mix-outputs"
+# 评估接口单个文件上限 4MB
+app.config["MAX_EVALUATE_FILE_SIZE"] = 4 * 1024 * 1024
 
-os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
-os.makedirs(app.config["OUTPUT_FOLDER"], exist_ok=True)
+# 注册 /api/mix、/api/evaluate、/api/output、/health（目录见 mixer_web.config）
+register_routes(app)
 
 CORS(app)
 
@@ -71,11 +57,6 @@ def index():
     return jsonify({"error": "index.html not found"}), 404
 
 
-@app.route("/health")
-def health():
-    return jsonify({"status": "ok"})
-
-
 @app.route("/api/test", methods=["GET", "POST"])
 def test():
     print(f"\n[/api/test] 收到请求, method={request.method}")
@@ -92,169 +73,6 @@ def favicon():
     return "", 204  # 返回空响应，忽略 favicon 请求
 
 
-@app.route("/api/mix", methods=["POST"])
-def mix():
-    import uuid
-
-    try:
-        if "track_a" not in request.files or "track_b" not in request.files:
-            return jsonify({"error": "Missing files"}), 400
-
-        m = get_mixer()
-
-        track_a = request.files["track_a"]
-        track_b = request.files["track_b"]
-        strategy = request.form.get("strategy", "crossfade")
-
-        track_a_path = os.path.join(
-            app.config["UPLOAD_FOLDER"], f"{uuid.uuid4()}_{secure_filename(track_a.filename)}"
-        )
-        track_b_path = os.path.join(
-            app.config["UPLOAD_FOLDER"], f"{uuid.uuid4()}_{secure_filename(track_b.filename)}"
-        )
-
-        track_a.save(track_a_path)
-        track_b.save(track_b_path)
-
-        output_filename = f"{uuid.uuid4()}.mp3"
-        output_path = os.path.join(app.config["OUTPUT_FOLDER"], output_filename)
-
-        result = m.mix(track_a_path, track_b_path, strategy=strategy, output_path=output_path)
-
-        try:
-            os.remove(track_a_path)
-            os.remove(track_b_path)
-        except:
-            pass
-
-        return jsonify(
-            {
-                "success": True,
-                "strategy": result["strategy"],
-                "bpm_a": result["bpm_a"],
-                "bpm_b": result["bpm_b"],
-                "duration": result["duration"],
-                "transition_point": result["transition_point"],
-                "output_url": f"/api/output/{output_filename}",
-            }
-        )
-    except Exception as e:
-        print(f"Mix error: {e}")
-        import traceback
-
-        traceback.print_exc()
-        return jsonify({"error": str(e)}), 500
-
-
-@app.route("/api/output/<filename>")
-def get_output(filename):
-    path = os.path.join(app.config["OUTPUT_FOLDER"], filename)
-    if os.path.exists(path):
-        return send_from_directory(app.config["OUTPUT_FOLDER"], filename, mimetype="audio/mpeg")
-    return jsonify({"error": "Not found"}), 404
-
-
-@app.route("/api/evaluate", methods=["POST"])
-def evaluate():
-    import uuid
-    import time
-
-    start_time = time.time()
-
-    print(f"\n{'=' * 60}")
-    print(f"[{time.strftime('%H:%M:%S')}] 收到 /api/evaluate 请求")
-    print(f"Content-Type: {request.content_type}")
-    print(f"Content-Length: {request.content_length}")
-
-    try:
-        from werkzeug.exceptions import RequestEntityTooLarge
-
-        app.config["MAX_CONTENT_LENGTH"] = 4 * 1024 * 1024
-
-        if "track_a" not in request.files or "track_b" not in request.files:
-            print("错误: 缺少文件")
-            return jsonify({"error": "Missing files"}), 400
-
-        track_a = request.files["track_a"]
-        track_b = request.files["track_b"]
-
-        # 检查文件大小
-        track_a.seek(0, 2)
-        size_a = track_a.tell()
-        track_a.seek(0)
-        track_b.seek(0, 2)
-        size_b = track_b.tell()
-        track_b.seek(0)
-
-        max_size = 4 * 1024 * 1024  # 4MB
-        if size_a > max_size or size_b > max_size:
-            return jsonify({"error": f"文件太大，请使用小于 4MB 的音频文件"}), 400
-
-        print(f"Track A: {track_a.filename}, size: {size_a}")
-        print(f"Track B: {track_b.filename}, size: {size_b}")
-
-        track_a_path = os.path.join(
-            app.config["UPLOAD_FOLDER"], f"{uuid.uuid4()}_{secure_filename(track_a.filename)}"
-        )
-        track_b_path = os.path.join(
-            app.config["UPLOAD_FOLDER"], f"{uuid.uuid4()}_{secure_filename(track_b.filename)}"
-        )
-
-        print(f"保存文件到: {track_a_path}")
-        track_a.save(track_a_path)
-        track_b.save(track_b_path)
-        print(f"文件保存完成, 耗时: {time.time() - start_time:.2f}s")
-
-        print("开始初始化 Mixer...")
-        t1 = time.time()
-        m = get_mixer()
-        print(f"Mixer 初始化完成, 耗时: {time.time() - t1:.2f}s")
-
-        print("开始分析音频...")
-        t2 = time.time()
-        result = m.evaluate_compatibility(track_a_path, track_b_path)
-        print(f"分析完成, 耗时: {time.time() - t2:.2f}s")
-        print(f"评估结果: {result}")
-
-        try:
-            os.remove(track_a_path)
-            os.remove(track_b_path)
-        except:
-            pass
-
-        total_time = time.time() - start_time
-        print(f"总耗时: {total_time:.2f}s")
-        print("=" * 60)
-
-        return jsonify(
-            {
-                "success": True,
-                "score": result["score"],
-                "bpm_score": result.get("bpm_score", 0),
-                "key_score": result.get("key_score", 0),
-                "beat_score": result.get("beat_score", 0),
-                "recommendation": result["recommendation"],
-                "recommendation_name": {
-                    "crossfade": "Crossfade",
-                    "beat_sync": "Beat-sync",
-                    "echo_fade": "Echo",
-                    "harmonic": "Harmonic",
-                }.get(result["recommendation"], result["recommendation"]),
-                "reason": result["reason"],
-                "bpm_a": result["bpm_a"],
-                "bpm_b": result["bpm_b"],
-            }
-        )
-
-    except Exception as e:
-        print(f"评估错误: {e}")
-        import traceback
-
-        traceback.print_exc()
-        print("=" * 60)
-        return jsonify({"error": str(e), "traceback": traceback.format_exc()}), 500
-
-
 # 启动
 if __name__ == "__main__":
     print("=" * 50)
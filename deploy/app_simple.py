@@ -4,7 +4,6 @@ Flask API Server for music-mix (Production Version - Simplified)
 
 import os
 import sys
-import uuid
 
 # 添加项目根目录到 Python 路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -12,9 +11,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 print(f"Python 路径: {sys.path[:3]}")
 
 try:
-    from flask import Flask, request, jsonify, send_file
+    from flask import Flask, jsonify
     from flask_cors import CORS
-    from werkzeug.utils import secure_filename
 
     print("✓ Flask 依赖加载成功")
 except ImportError as e:
@@ -22,7 +20,7 @@ except ImportError as e:
     sys.exit(1)
 
 try:
-    from mixer_core.mixer import Mixer
+    from mixer_web.handlers import register_routes
 
     print("✓ Mixer 模块导入成功")
 except ImportError as e:
@@ -32,21 +30,12 @@ except ImportError as e:
 # 创建 Flask 应用
 app = Flask(__name__)
 
-# 配置
-app.config["MAX_CONTENT_LENGTH"] = 50 * 1024 * 1024  # 50MB
-app.config["UPLOAD_FOLDER"] = os.environ.get("UPLOAD_FOLDER", "/tmp/music-mix-uploads")
-app.config["OUTPUT_FOLDER"] = os.environ.get("OUTPUT_FOLDER", "/tmp/music-mix-outputs")
+# 注册 /api/mix、/api/evaluate、/api/output、/health（目录和上传上限见 mixer_web.config）
+register_routes(app)
 
 # 启用 CORS
 CORS(app)
 
-# 确保目录存在
-os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
-os.makedirs(app.config["OUTPUT_FOLDER"], exist_ok=True)
-
-# 初始化 Mixer
-mixer = Mixer()
-
 
 @app.route("/", methods=["GET"])
 def index():
@@ -66,143 +55,6 @@ def serve_static(path):
         return jsonify({"error": f"文件未找到: {path}"}), 404
 
 
-@app.route("/health", methods=["GET"])
-def health():
-    """健康检查"""
-    return jsonify({"status": "ok"})
-
-
-@app.route("/api/mix", methods=["POST"])
-def mix():
-    """混音接口"""
-    try:
-        if "track_a" not in request.files or "track_b" not in request.files:
-            return jsonify({"error": "缺少音频文件"}), 400
-
-        track_a = request.files["track_a"]
-        track_b = request.files["track_b"]
-        strategy = request.form.get("strategy", "crossfade")
-
-        # 保存上传文件
-        track_a_path = os.path.join(
-            app.config["UPLOAD_FOLDER"], f"{uuid.uuid4()}_{secure_filename(track_a.filename)}"
-        )
-        track_b_path = os.path.join(
-            app.config["UPLOAD_FOLDER"], f"{uuid.uuid4()}_{secure_filename(track_b.filename)}"
-        )
-
-        track_a.save(track_a_path)
-        track_b.save(track_b_path)
-
-        # 混音
-        output_filename = f"{uuid.uuid4()}.mp3"
-        output_path = os.path.join(app.config["OUTPUT_FOLDER"], output_filename)
-
-        result = mixer.mix(track_a_path, track_b_path, strategy=strategy, output_path=output_path)
-
-        # 清理临时文件
-        try:
-            os.remove(track_a_path)
-            os.remove(track_b_path)
-        except Exception:
-            pass
-
-        return jsonify(
-            {
-                "success": True,
-                "strategy": result["strategy"],
-                "bpm_a": result["bpm_a"],
-                "bpm_b": result["bpm_b"],
-                "duration": result["duration"],
-                "transition_point": result["transition_point"],
-                "transition_point_b": result.get("transition_point_b", 0),
-                "transition_duration": result.get("transition_duration", 10),
-                "output_url": f"/api/output/{output_filename}",
-                "compatibility": result.get("compatibility", {}),
-            }
-        )
-
-    except Exception as e:
-        print(f"混音错误: {e}")
-        import traceback
-
-        traceback.print_exc()
-        return jsonify({"error": str(e)}), 500
-
-
-@app.route("/api/output/<filename>", methods=["GET"])
-def get_output(filename):
-    """获取混音结果"""
-    path = os.path.join(app.config["OUTPUT_FOLDER"], filename)
-    if os.path.exists(path):
-        return send_file(path, mimetype="audio/mpeg")
-    return jsonify({"error": "文件未找到"}), 404
-
-
-@app.route("/api/evaluate", methods=["POST"])
-def evaluate():
-    """评估两首歌曲的兼容性"""
-    try:
-        if "track_a" not in request.files or "track_b" not in request.files:
-            return jsonify({"error": "缺少音频文件"}), 400
-
-        track_a = request.files["track_a"]
-        track_b = request.files["track_b"]
-
-        # 保存临时文件
-        track_a_path = os.path.join(
-            app.config["UPLOAD_FOLDER"], f"{uuid.uuid4()}_{secure_filename(track_a.filename)}"
-        )
-        track_b_path = os.path.join(
-            app.config["UPLOAD_FOLDER"], f"{uuid.uuid4()}_{secure_filename(track_b.filename)}"
-        )
-
-        track_a.save(track_a_path)
-        track_b.save(track_b_path)
-
-        # 评估兼容性
-        result = mixer.evaluate_compatibility(track_a_path, track_b_path)
-
-        # 清理
-        try:
-            os.remove(track_a_path)
-            os.remove(track_b_path)
-        except Exception:
-            pass
-
-        # 映射策略名称
-        strategy_names = {
-            "beat_sync": "Beat-sync",
-            "crossfade": "Crossfade",
-            "echo_fade": "Echo",
-            "harmonic": "Harmonic",
-        }
-
-        return jsonify(
-            {
-                "success": True,
-                "score": result["score"],
-                "bpm_score": result.get("bpm_score"),
-                "key_score": result.get("key_score"),
-                "beat_score": result.get("beat_score"),
-                "bpm_a": result["bpm_a"],
-                "bpm_b": result["bpm_b"],
-                "recommendation": result["recommendation"],
-                "recommendation_name": strategy_names.get(
-                    result["recommendation"], result["recommendation"]
-                ),
-                "reason": result["reason"],
-            }
-        )
-
-    except Exception as e:
-        print(f"评估错误: {e}")
-        import traceback
-
-        traceback.print_exc()
-        return jsonify({"error": str(e)}), 500
-
-
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
     print(f"启动 Flask 应用，端口: {port}")
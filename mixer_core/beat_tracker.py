@@ -9,6 +9,9 @@ from pathlib import Path
 import librosa
 import numpy as np
 
+from mixer_core.config import ANALYSIS_SR
+from mixer_core.fastmath import normalize_bpm
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,7 +19,7 @@ class BeatTracker:
     """节拍追踪器"""
 
     def __init__(self):
-        self.sr = 16000  # 降低采样率以提高速度
+        self.sr = ANALYSIS_SR
         self.hop_length = 512
 
     def track(self, audio_path: str) -> dict:
@@ -37,7 +40,7 @@ class BeatTracker:
         tempo, beat_frames = librosa.beat.beat_track(y=y, sr=sr, hop_length=self.hop_length)
 
         # 转换为时间（秒）
-        beat_times = librosa.frames_to_time(beat_frames, sr=sr, hop_length=self.hop_length)
+        beat_times = beat_frames * self.hop_length / sr
 
         # 后处理 BPM
         tempo = self._post_process_bpm(tempo)
@@ -65,11 +68,7 @@ class BeatTracker:
 
     def _post_process_bpm(self, tempo: float) -> float:
         """BPM 后处理"""
-        while tempo > 200:
-            tempo /= 2
-        while tempo < 60:
-            tempo *= 2
-        return tempo
+        return normalize_bpm(tempo)
 
     def _get_downbeats(self, beat_times: np.ndarray, tempo: float) -> np.ndarray:
         """
@@ -116,18 +115,15 @@ class BeatTracker:
         if not downbeats:
             return target_time
 
-        downbeats = np.array(downbeats)
+        # downbeats 按时间升序，二分查找即可
+        downbeats = np.asarray(downbeats)
 
         if direction == "before":
-            candidates = downbeats[downbeats <= target_time]
-            if len(candidates) > 0:
-                return float(candidates[-1])
-            return float(downbeats[0])
+            idx = np.searchsorted(downbeats, target_time, side="right")
+            return float(downbeats[max(0, idx - 1)])
         else:
-            candidates = downbeats[downbeats >= target_time]
-            if len(candidates) > 0:
-                return float(candidates[0])
-            return float(downbeats[-1])
+            idx = np.searchsorted(downbeats, target_time, side="left")
+            return float(downbeats[min(len(downbeats) - 1, idx)])
 
     def get_transition_point(self, audio_path: str, transition_duration: float = 10.0) -> dict:
         """
@@ -142,7 +138,8 @@ class BeatTracker:
         """
         result = self.track(audio_path)
 
-        duration = librosa.get_duration(filename=audio_path)
+        # track() 已经算出时长，无需再次打开文件
+        duration = result["duration"]
         beats = result["beats"]
 
         # 在歌曲结尾找合适的过渡点
@@ -150,9 +147,12 @@ class BeatTracker:
         end_time = duration
         start_time = max(0, end_time - transition_duration)
 
-        # 找到最接近的节拍点
-        start_beat = max([b for b in beats if b <= start_time], default=0)
-        end_beat = min([b for b in beats if b >= end_time], default=duration)
+        # 找到最接近的节拍点（beats 按时间升序，二分查找）
+        beats = np.asarray(beats)
+        i = np.searchsorted(beats, start_time, side="right")
+        start_beat = beats[i - 1] if i > 0 else 0
+        j = np.searchsorted(beats, end_time, side="left")
+        end_beat = beats[j] if j < len(beats) else duration
 
         return {
             "start_time": float(start_beat),
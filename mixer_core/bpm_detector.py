@@ -4,11 +4,18 @@ BPM 检测模块
 """
 
 import logging
+import os
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import librosa
 import numpy as np
 
+from mixer_core.config import ANALYSIS_SR
+from mixer_core.fastmath import MAX_BPM, MIN_BPM, normalize_bpm
+from mixer_core.parallel import limit_blas_threads
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,7 +23,7 @@ class BPMDetector:
     """BPM 检测器"""
 
     def __init__(self):
-        self.sr = 16000  # 降低采样率以提高速度  # 采样率
+        self.sr = ANALYSIS_SR  # 采样率
         self.hop_length = 512  # 帧移
 
     def detect(self, audio_path: str) -> dict:
@@ -34,20 +41,22 @@ class BPMDetector:
         # 加载音频
         y, sr = librosa.load(audio_path, sr=self.sr)
 
-        # BPM 检测 - 使用动态规划
-        tempo, beats = librosa.beat.beat_track(y=y, sr=sr, hop_length=self.hop_length)
+        # BPM 检测 - 起音包络的自相关，不需要逐拍的动态规划
+        onset_env = librosa.onset.onset_strength(y=y, sr=sr, hop_length=self.hop_length)
+        tempo = librosa.feature.tempo(onset_envelope=onset_env, sr=sr, hop_length=self.hop_length)
 
         # 后处理：处理 2x/0.5x 问题
         tempo = self._post_process(tempo)
 
-        # 计算置信度（基于节拍的清晰度）
-        confidence = self._calculate_confidence(y, beats)
+        # 计算置信度（基于节奏的周期性）
+        confidence = self._calculate_tempo_confidence(onset_env)
 
+        duration = float(librosa.get_duration(y=y, sr=sr))
         result = {
             "bpm": float(tempo),
             "confidence": float(confidence),
-            "beat_count": len(beats),
-            "duration": float(librosa.get_duration(y=y, sr=sr)),
+            "beat_count": round(duration * tempo / 60),
+            "duration": duration,
         }
 
         logger.info(f"BPM 检测完成: {result}")
@@ -55,43 +64,50 @@ class BPMDetector:
 
     def _post_process(self, tempo: float) -> float:
         """后处理：处理 BPM 2x/0.5x 问题"""
-        # 人类音乐的 BPM 范围通常是 60-200
-        # 如果检测到 > 200，可能是实际 BPM 的 2 倍
-        while tempo > 200:
-            tempo /= 2
-        # 如果检测到 < 60，可能是实际 BPM 的一半
-        while tempo < 60:
-            tempo *= 2
-        return tempo
-
-    def _calculate_confidence(self, y: np.ndarray, beats: np.ndarray) -> float:
-        """计算检测置信度"""
-        if len(beats) < 4:
-            return 0.0
+        # 人类音乐的 BPM 范围通常是 60-200，超出时按 2 倍关系折叠
+        return normalize_bpm(tempo)
 
-        # 计算节拍间隔的变异系数
-        beat_times = librosa.frames_to_time(beats, sr=self.sr, hop_length=self.hop_length)
-        intervals = np.diff(beat_times)
+    def _calculate_tempo_confidence(self, onset_env: np.ndarray) -> float:
+        """
+        计算检测置信度：起音包络在 60-200 BPM 对应延迟上的最大归一化自相关 (0-1)
+
+        节奏稳定的音乐接近 1，没有明显节奏的音频接近 0
+        """
+        frames_per_min = 60 * self.sr / self.hop_length
+        min_lag = int(frames_per_min / MAX_BPM)
+        max_lag = int(np.ceil(frames_per_min / MIN_BPM))
 
-        if len(intervals) == 0:
+        ac = librosa.autocorrelate(onset_env - onset_env.mean(), max_size=max_lag + 1)
+        if len(ac) <= min_lag or ac[0] <= 0:
             return 0.0
+        return float(np.clip(ac[min_lag:].max() / ac[0], 0.0, 1.0))
 
-        # CV = std / mean，越小说明节拍越稳定
-        cv = np.std(intervals) / np.mean(intervals) if np.mean(intervals) > 0 else 1.0
+    def detect_batch(self, audio_paths: list[str], max_workers: int | None = None) -> list[dict]:
+        """批量检测多个音频文件的 BPM"""
+        return list(self.detect_iter(audio_paths, max_workers))
 
-        # 转换为置信度 (0-1)
-        confidence = max(0, 1 - cv)
-        return confidence
+    def detect_iter(self, audio_paths: list[str], max_workers: int | None = None) -> Iterator[dict]:
+        """
+        在多个进程中并行检测，按 audio_paths 的顺序逐个产出结果
 
-    def detect_batch(self, audio_paths: list[str]) -> list[dict]:
-        """批量检测多个音频文件的 BPM"""
-        results = []
-        for path in audio_paths:
-            try:
-                result = self.detect(path)
-                result["file"] = path
-                results.append(result)
-            except Exception as e:
-                logger.error(f"BPM 检测失败 {path}: {e}")
-                results.append({"file": path, "error": str(e)})
-        return results
+        Args:
+            audio_paths: 音频文件路径列表
+            max_workers: 进程数，默认为 CPU 核数；为 1 时在当前进程中逐个检测
+        """
+        max_workers = min(max_workers or os.cpu_count() or 1, len(audio_paths))
+        if max_workers <= 1:
+            yield from map(self._detect_one, audio_paths)
+            return
+
+        with ProcessPoolExecutor(max_workers, initializer=limit_blas_threads) as executor:
+            yield from executor.map(self._detect_one, audio_paths)
+
+    def _detect_one(self, path: str) -> dict:
+        """检测单个文件，失败时返回包含 error 的结果"""
+        try:
+            result = self.detect(path)
+            result["file"] = path
+            return result
+        except Exception as e:
+            logger.error(f"BPM 检测失败 {path}: {e}")
+            return {"file": path, "error": str(e)}
@@ -0,0 +1,64 @@
+"""
+音频缓冲池模块
+复用按 2 的幂分档的 numpy 临时数组，避免每次混音都重新分配整首歌大小的内存
+"""
+
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+# 空闲列表中最多保留的字节数
+MAX_POOL_BYTES = 512 * 1024 * 1024
+
+
+class AudioBufferPool:
+    """线程安全的 numpy 缓冲池"""
+
+    def __init__(self, max_bytes: int = MAX_POOL_BYTES):
+        self.max_bytes = max_bytes
+        self._free = {}  # (dtype, 容量) -> [ndarray]
+        self._free_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, n_samples: int, dtype=np.float32) -> np.ndarray:
+        """取出长度为 n_samples 的数组（内容未初始化）"""
+        dtype = np.dtype(dtype)
+        capacity = 1 << max(n_samples - 1, 0).bit_length()
+        key = (dtype.str, capacity)
+
+        with self._lock:
+            buffers = self._free.get(key)
+            if buffers:
+                base = buffers.pop()
+                self._free_bytes -= base.nbytes
+            else:
+                base = None
+
+        if base is None:
+            base = np.empty(capacity, dtype=dtype)
+        return base[:n_samples]
+
+    def put(self, arr: np.ndarray) -> None:
+        """归还 get() 取出的数组，超出容量上限时直接丢弃"""
+        base = arr.base if arr.base is not None else arr
+        key = (base.dtype.str, len(base))
+
+        with self._lock:
+            if self._free_bytes + base.nbytes > self.max_bytes:
+                return
+            self._free.setdefault(key, []).append(base)
+            self._free_bytes += base.nbytes
+
+    @contextmanager
+    def borrow(self, n_samples: int, dtype=np.float32):
+        """在 with 块内借用数组，退出时自动归还"""
+        arr = self.get(n_samples, dtype)
+        try:
+            yield arr
+        finally:
+            self.put(arr)
+
+
+# 进程内共享的缓冲池
+buffer_pool = AudioBufferPool()
@@ -0,0 +1,289 @@
+"""
+缓存模块
+线程安全的 LRU 内存缓存，以及带磁盘持久化的 JSON 结果缓存和音频特征缓存
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 磁盘缓存根目录
+CACHE_DIR = os.environ.get(
+    "MUSIC_MIX_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "music-mix")
+)
+
+# 缓存格式版本：特征提取或分析算法变化、已缓存的结果不再有效时加一，
+# 各缓存目录都在 CACHE_DIR/v<版本> 下，旧版本的目录首次使用缓存时删除
+CACHE_VERSION = 3
+
+# 加入版本号之前的缓存目录
+_LEGACY_DIRS = ("features", "analysis", "eval")
+
+# 磁盘缓存的默认大小上限，超出时按最近使用时间淘汰
+JSON_CACHE_MAX_BYTES = 64 * 1024 * 1024
+FEATURE_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+# 计算文件指纹时读取的首尾字节数
+FINGERPRINT_SAMPLE = 64 * 1024
+
+
+class LRUCache:
+    """线程安全的 LRU 缓存"""
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class DiskBudget:
+    """
+    限制目录中缓存文件（指定后缀）的总大小，超出时删除最久未使用的文件
+
+    文件的修改时间即最近使用时间（命中时由 touch 更新）；每新写入约 1/16 上限的数据
+    才扫描一次目录，不必每次写入都遍历
+    """
+
+    def __init__(self, directory: str, suffix: str, max_bytes: int):
+        self.directory = directory
+        self.suffix = suffix
+        self.max_bytes = max_bytes
+        self._scan_every = max(1, max_bytes // 16)
+        self._written = 0
+        self._lock = threading.Lock()
+
+    def touch(self, path: str) -> None:
+        """标记文件刚被使用"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def added(self, path: str) -> None:
+        """记录新写入的文件，累计写入量足够时清理目录"""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        with self._lock:
+            self._written += size
+            if self._written < self._scan_every:
+                return
+            self._written = 0
+        self.prune()
+
+    def prune(self) -> None:
+        """按修改时间从旧到新删除文件，直到总大小不超过上限"""
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(self.suffix) and entry.is_file():
+                        st = entry.stat()
+                        entries.append((st.st_mtime, st.st_size, entry.path))
+        except OSError:
+            return
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+
+class JSONCache:
+    """内存 LRU + 磁盘 JSON 文件的两级缓存（磁盘部分总大小不超过 max_bytes）"""
+
+    def __init__(self, cache_dir: str, maxsize: int = 1024, max_bytes: int = JSON_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self._memory = LRUCache(maxsize)
+        self._disk = DiskBudget(cache_dir, ".json", max_bytes)
+
+    def get(self, key: str) -> dict | None:
+        value = self._memory.get(key)
+        if value is not None:
+            return value
+
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        self._disk.touch(path)
+        self._memory.put(key, value)
+        return value
+
+    def put(self, key: str, value: dict) -> None:
+        self._memory.put(key, value)
+        path = self._path(key)
+        try:
+            atomic_write_json(path, value)
+        except OSError as e:
+            logger.warning(f"写入磁盘缓存失败 {key}: {e}")
+            return
+        self._disk.added(path)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+
+class FeatureCache:
+    """
+    内存 LRU + 磁盘 npz 文件的音频特征缓存
+
+    特征为 {名称: ndarray 或可 JSON 序列化的值}，数组原样存入 npz，
+    其他值序列化为 JSON 字符串，读取时无需 pickle；磁盘部分总大小不超过 max_bytes
+    """
+
+    def __init__(self, cache_dir: str, maxsize: int = 16, max_bytes: int = FEATURE_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self._memory = LRUCache(maxsize)
+        self._disk = DiskBudget(cache_dir, ".npz", max_bytes)
+
+    def get(self, key: str) -> dict | None:
+        value = self._memory.get(key)
+        if value is not None:
+            return value
+
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                json_keys = set(json.loads(str(data["__json_keys__"])))
+                value = {
+                    name: json.loads(str(data[name])) if name in json_keys else data[name]
+                    for name in data.files
+                    if name != "__json_keys__"
+                }
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return None
+
+        self._disk.touch(path)
+        self._memory.put(key, value)
+        return value
+
+    def put(self, key: str, value: dict) -> None:
+        self._memory.put(key, value)
+
+        arrays = {}
+        json_keys = []
+        for name, item in value.items():
+            if isinstance(item, np.ndarray):
+                arrays[name] = item
+            else:
+                arrays[name] = np.array(json.dumps(item))
+                json_keys.append(name)
+        arrays["__json_keys__"] = np.array(json.dumps(json_keys))
+
+        path = self._path(key)
+        try:
+            _atomic_write(path, "wb", lambda f: np.savez(f, **arrays))
+        except OSError as e:
+            logger.warning(f"写入特征缓存失败 {key}: {e}")
+            return
+        self._disk.added(path)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+
+def cache_path(*parts: str) -> str:
+    """当前版本的缓存目录 CACHE_DIR/v<CACHE_VERSION>/<parts>，首次调用时删除旧版本的缓存目录"""
+    _remove_stale_versions()
+    return os.path.join(CACHE_DIR, f"v{CACHE_VERSION}", *parts)
+
+
+_stale_removed = False
+
+
+def _remove_stale_versions() -> None:
+    global _stale_removed
+    if _stale_removed:
+        return
+    _stale_removed = True
+
+    try:
+        names = os.listdir(CACHE_DIR)
+    except OSError:
+        return
+    current = f"v{CACHE_VERSION}"
+    for name in names:
+        if name in _LEGACY_DIRS or (name != current and re.fullmatch(r"v\d+", name)):
+            shutil.rmtree(os.path.join(CACHE_DIR, name), ignore_errors=True)
+
+
+def file_fingerprint(path: str | os.PathLike) -> str:
+    """
+    文件的快速指纹：大小、修改时间和首尾各 64KB 内容的 BLAKE2b 哈希
+
+    不读取整个文件，适合作为本地文件分析结果的缓存键
+    """
+    st = os.stat(path)
+    h = hashlib.blake2b(f"{st.st_size}:{st.st_mtime_ns}".encode(), digest_size=16)
+    with open(path, "rb") as f:
+        h.update(f.read(FINGERPRINT_SAMPLE))
+        if st.st_size > 2 * FINGERPRINT_SAMPLE:
+            f.seek(-FINGERPRINT_SAMPLE, os.SEEK_END)
+        h.update(f.read(FINGERPRINT_SAMPLE))
+    return h.hexdigest()
+
+
+def atomic_write_json(path: str, value) -> None:
+    """先写临时文件再重命名，避免并发读到写了一半的文件"""
+    _atomic_write(path, "w", lambda f: json.dump(value, f, ensure_ascii=False))
+
+
+def _atomic_write(path: str, mode: str, write) -> None:
+    """在目标目录创建临时文件，由 write(f) 写入内容后原子替换到 path"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        encoding = None if "b" in mode else "utf-8"
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
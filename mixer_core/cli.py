@@ -46,21 +46,25 @@ def scan(folder_path: str, output_format: str, recursive: bool):
         click.echo("未找到 mp3 文件", err=True)
         return
 
-    # 检测每首歌曲的 BPM
+    # 检测每首歌曲的 BPM（多进程并行）
+    # JSON 格式边检测边输出，每行一个对象，不在内存中拼出整个结果字符串
     results = []
-    for mp3_file in tqdm(mp3_files, desc="检测 BPM"):
-        try:
-            result = detector.detect(str(mp3_file))
-            result["file"] = mp3_file.name
-            result["path"] = str(mp3_file)
+    if output_format == "json":
+        click.echo("[")
+    detections = detector.detect_iter([str(f) for f in mp3_files])
+    for i, (mp3_file, result) in enumerate(
+        tqdm(zip(mp3_files, detections), total=len(mp3_files), desc="检测 BPM")
+    ):
+        result["file"] = mp3_file.name
+        result["path"] = str(mp3_file)
+        if output_format == "json":
+            click.echo(("," if i else "") + json.dumps(result, ensure_ascii=False))
+        else:
             results.append(result)
-        except Exception as e:
-            logger.error(f"检测失败 {mp3_file}: {e}")
-            results.append({"file": mp3_file.name, "path": str(mp3_file), "error": str(e)})
 
     # 输出结果
     if output_format == "json":
-        click.echo(json.dumps(results, indent=2, ensure_ascii=False))
+        click.echo("]")
     else:
         for r in results:
             if "error" in r:
@@ -179,41 +183,48 @@ def playlist(folder_path: str, strategy: str, output: str, duration: float, outp
             shutil.copy(str(mp3_files[0]), output)
         return
 
-    mixer = Mixer()
+    import os
+    import subprocess
+    import tempfile
 
-    try:
-        # 依次混音每两首歌曲
-        current_output = output or "/tmp/playlist_output.mp3"
+    from pydub.utils import get_encoder_name
 
-        # 先混音前两首
-        click.echo(f"混音: {mp3_files[0].name} -> {mp3_files[1].name}")
-        result = mixer.mix(
-            str(mp3_files[0]),
-            str(mp3_files[1]),
-            strategy=strategy,
-            output_path=current_output,
-            transition_duration=duration,
-        )
+    mixer = Mixer()
+    current_output = output or "/tmp/playlist_output.mp3"
 
-        # 依次添加后续歌曲
-        for i in range(2, len(mp3_files)):
-            temp_output = f"/tmp/playlist_temp_{i}.mp3"
-            click.echo(f"混音: 已有结果 -> {mp3_files[i].name}")
-
-            # 混音当前结果和下一首
-            result = mixer.mix(
-                current_output,
-                str(mp3_files[i]),
-                strategy=strategy,
-                output_path=temp_output,
-                transition_duration=duration,
+    try:
+        # 中间结果保存为无损 WAV，只在最后编码一次 MP3，
+        # 避免每加一首歌都把整个已有结果重新解码、编码一遍
+        with tempfile.TemporaryDirectory(prefix="playlist_") as work_dir:
+            current = str(mp3_files[0])
+            for i in range(1, len(mp3_files)):
+                if i == 1:
+                    click.echo(f"混音: {mp3_files[0].name} -> {mp3_files[1].name}")
+                else:
+                    click.echo(f"混音: 已有结果 -> {mp3_files[i].name}")
+
+                # 混音当前结果和下一首（中间结果只用一次，不写特征缓存）
+                temp_output = os.path.join(work_dir, f"mix_{i}.wav")
+                result = mixer.mix(
+                    current,
+                    str(mp3_files[i]),
+                    strategy=strategy,
+                    output_path=temp_output,
+                    transition_duration=duration,
+                    cache=False,
+                )
+
+                if i > 1:
+                    os.remove(current)
+                current = temp_output
+
+            encoder = get_encoder_name()
+            subprocess.run(
+                [encoder, "-y", "-loglevel", "error", "-i", current, "-f", "mp3", current_output],
+                check=True,
+                capture_output=True,
             )
 
-            # 替换
-            import os
-
-            os.replace(temp_output, current_output)
-
         click.echo(f"✓ 播放列表混音完成")
         click.echo(f"  歌曲数: {len(mp3_files)}")
         click.echo(f"  总时长: {result['duration']:.1f}秒")
@@ -4,10 +4,18 @@
 """
 
 import logging
+import os
+from typing import BinaryIO
 
 import librosa
 import numpy as np
 
+from mixer_core.cache import JSONCache, cache_path, file_fingerprint
+from mixer_core.config import ANALYSIS_SR
+from mixer_core.fastmath import beat_confidence, normalize_bpm
+from mixer_core.parallel import run_pair
+from mixer_core.spectral import HOP_LENGTH, onset_and_chroma
+
 logger = logging.getLogger(__name__)
 
 # 五度圈映射
@@ -38,6 +46,27 @@ CIRCLE_OF_FIFTHS = {
     "Dm": 11,
 }
 
+# 调性在五度圈上的位置（沿用评分时去掉升降号再查表的规则），导入时算好
+KEY_POSITIONS = {
+    key: CIRCLE_OF_FIFTHS.get(key.replace("#", "").replace("b", ""), 0) for key in CIRCLE_OF_FIFTHS
+}
+
+# 调性检测的候选调性（前 12 个大调，后 12 个小调）
+KEY_NAMES = list(CIRCLE_OF_FIFTHS)
+
+# 大调 / 小调音阶模板
+MAJOR_PATTERN = np.array([1, 0, 1, 0, 1, 1, 0, 1, 0, 1, 0, 1], dtype=np.float64)
+MINOR_PATTERN = np.array([1, 0, 1, 1, 0, 1, 0, 1, 0, 1, 0, 0], dtype=np.float64)
+
+# 每个候选调性对应的模板，形状 (24, 12)
+KEY_PATTERNS = np.stack(
+    [MINOR_PATTERN if key.endswith("m") else MAJOR_PATTERN for key in KEY_NAMES]
+)
+
+# 兼容性分析截取的片段：从全曲约 1/3 处开始的 30 秒（本地文件、上传数据和混音统一使用）
+ANALYZE_WINDOW = 30.0
+ANALYZE_OFFSET_RATIO = 1 / 3
+
 # 评分权重 - 调整后
 WEIGHTS = {
     "bpm": 0.45,
@@ -61,6 +90,12 @@ RECOMMENDATION_RULES = [
 ]
 
 
+def analysis_window(duration: float) -> tuple[float, float]:
+    """全曲时长为 duration 秒时兼容性分析片段的起点和长度（秒）"""
+    offset = min(duration * ANALYZE_OFFSET_RATIO, max(0.0, duration - ANALYZE_WINDOW))
+    return offset, min(ANALYZE_WINDOW, duration - offset)
+
+
 def recommend_strategy(
     score: float, bpm_score: float, key_score: float, bpm_a: float, bpm_b: float
 ) -> tuple[str, str]:
@@ -97,20 +132,92 @@ def recommend_strategy(
 class TrackAnalyzer:
     """单曲分析器"""
 
-    def __init__(self, sr: int = 16000):  # 降低采样率以提高速度
+    def __init__(self, sr: int = ANALYSIS_SR):
         self.sr = sr
+        self.hop_length = 512  # 与 beat_track 默认帧移一致
+        self._cache = JSONCache(cache_path("analysis", str(sr)), maxsize=64)
 
-    def analyze(self, audio_path: str) -> dict:
-        """分析单曲，返回特征字典"""
-        y, sr = librosa.load(audio_path, sr=self.sr)
+    def analyze(self, audio_path: str | BinaryIO) -> dict:
+        """
+        分析单曲，返回特征字典（audio_path 也可以是内存中的文件对象）
 
+        只分析约 1/3 处开始的 30 秒（跳过常常安静或不典型的前奏），本地文件只解码这一段，
+        结果按文件指纹缓存，同一文件再次分析时不重新解码
+        """
+        if not isinstance(audio_path, (str, os.PathLike)):
+            y, sr = librosa.load(audio_path, sr=self.sr)
+            info, _ = self.analyze_track(y, sr)
+            return info
+
+        key = file_fingerprint(audio_path)
+        info = self._cache.get(key)
+        if info is not None:
+            return info
+
+        duration = librosa.get_duration(path=audio_path)
+        offset, length = analysis_window(duration)
+        y, sr = librosa.load(audio_path, sr=self.sr, offset=offset, duration=length)
+        info = self._analyze_loaded(y, sr)
+        info["duration"] = float(duration)
+
+        self._cache.put(key, info)
+        return info
+
+    def analyze_track(self, y: np.ndarray, sr: int) -> tuple[dict, np.ndarray]:
+        """
+        分析已加载的完整音频，返回 (特征字典, 全曲节拍帧号)，只做一次 STFT
+
+        特征取自与 analyze 相同的片段，duration 为全曲时长；
+        全曲节拍按片段检测出的 BPM 跟踪，与特征中的 bpm 一致
+        """
+        offset, length = analysis_window(len(y) / sr)
+        lo = int(round(offset * sr / HOP_LENGTH))
+        hi = lo + int(round(length * sr / HOP_LENGTH))
+        onset_env, chroma_mean = onset_and_chroma(y, sr, chroma_frames=(lo, hi))
+
+        tempo, window_beats = librosa.beat.beat_track(
+            onset_envelope=onset_env[lo:hi], sr=sr, hop_length=HOP_LENGTH
+        )
+        info = self.analyze_signal(
+            y[lo * HOP_LENGTH : hi * HOP_LENGTH], sr, tempo, window_beats, chroma_mean
+        )
+        info["duration"] = float(len(y) / sr)
+
+        # 片段中没有检测到节拍（bpm 为 0）时由 beat_track 自行估计速度
+        _, beats = librosa.beat.beat_track(
+            onset_envelope=onset_env, sr=sr, hop_length=HOP_LENGTH, bpm=info["bpm"] or None
+        )
+        return info, beats
+
+    def _analyze_loaded(self, y: np.ndarray, sr: int) -> dict:
+        """检测已加载音频的节拍并提取特征（节拍检测和调性检测共用一次 STFT）"""
+        onset_env, chroma_mean = onset_and_chroma(y, sr)
+        tempo, beats = librosa.beat.beat_track(
+            onset_envelope=onset_env, sr=sr, hop_length=HOP_LENGTH
+        )
+        return self.analyze_signal(y, sr, tempo, beats, chroma_mean)
+
+    def analyze_signal(
+        self,
+        y: np.ndarray,
+        sr: int,
+        tempo: float,
+        beats: np.ndarray,
+        chroma_mean: np.ndarray | None = None,
+    ) -> dict:
+        """
+        根据已加载的音频和节拍检测结果提取特征
+
+        chroma_mean 为 spectral.onset_and_chroma 得到的色度向量，为空时重新计算
+        """
         # BPM和节拍
-        tempo, beats = librosa.beat.beat_track(y=y, sr=sr)
         tempo = self._post_process_bpm(tempo)
         confidence = self._calculate_beat_confidence(y, beats)
 
         # 调性
-        key, key_confidence = self._detect_key(y, sr)
+        if chroma_mean is None:
+            _, chroma_mean = onset_and_chroma(y, sr)
+        key, key_confidence = self._detect_key(chroma_mean)
 
         return {
             "bpm": float(tempo),
@@ -122,76 +229,25 @@ class TrackAnalyzer:
 
     def _post_process_bpm(self, tempo: float) -> float:
         """BPM后处理"""
-        while tempo > 200:
-            tempo /= 2
-        while tempo < 60:
-            tempo *= 2
-        return tempo
+        return normalize_bpm(tempo)
 
     def _calculate_beat_confidence(self, y: np.ndarray, beats: np.ndarray) -> float:
         """计算节拍置信度"""
-        if len(beats) < 4:
-            return 0.0
-        beat_times = librosa.frames_to_time(beats, sr=self.sr)
-        intervals = np.diff(beat_times)
-        if len(intervals) == 0:
-            return 0.0
-        cv = np.std(intervals) / np.mean(intervals) if np.mean(intervals) > 0 else 1.0
-        return max(0, 1 - cv)
-
-    def _detect_key(self, y: np.ndarray, sr: int) -> tuple[str, float]:
-        """检测调性"""
-        chroma = librosa.feature.chroma_cqt(y=y, sr=sr)
-        chroma_mean = np.mean(chroma, axis=1)
-
-        major_pattern = np.array([1, 0, 1, 0, 1, 1, 0, 1, 0, 1, 0, 1])
-        minor_pattern = np.array([1, 0, 1, 1, 0, 1, 0, 1, 0, 1, 0, 0])
-
-        keys = [
-            "C",
-            "G",
-            "D",
-            "A",
-            "E",
-            "B",
-            "F#",
-            "Db",
-            "Ab",
-            "Eb",
-            "Bb",
-            "F",
-            "Am",
-            "Em",
-            "Bm",
-            "F#m",
-            "C#m",
-            "G#m",
-            "Ebm",
-            "Bbm",
-            "Fm",
-            "Cm",
-            "Gm",
-            "Dm",
-        ]
-
-        best_key = "C"
-        best_score = 0
-
-        for key in keys:
-            is_minor = "m" in key
-            pattern = minor_pattern if is_minor else major_pattern
-            score = np.dot(chroma_mean, pattern)
-            if score > best_score:
-                best_score = score
-                best_key = key
-
-        return best_key, float(best_score)
+        # 帧号 * 帧移 / 采样率，与 librosa.frames_to_time 结果相同
+        return beat_confidence(np.asarray(beats) * self.hop_length / self.sr)
+
+    def _detect_key(self, chroma_mean: np.ndarray) -> tuple[str, float]:
+        """根据时间平均的色度向量检测调性"""
+        # 一次矩阵乘法算出全部 24 个调性的得分，argmax 取第一个最高分（与逐个比较一致）
+        scores = KEY_PATTERNS @ chroma_mean
+        idx = int(scores.argmax())
+        return KEY_NAMES[idx], float(scores[idx])
 
 
 class CompatibilityEvaluator:
     """兼容性评估器"""
 
-    def __init__(self, sr: int = 22050):
+    def __init__(self, sr: int = ANALYSIS_SR):
         self.analyzer = TrackAnalyzer(sr)
 
     def evaluate(self, track_a_info: dict, track_b_info: dict) -> dict:
@@ -254,8 +310,8 @@ class CompatibilityEvaluator:
 
     def _score_key(self, key_a: str, key_b: str) -> float:
         """调性兼容性评分 - 范围30-90"""
-        pos_a = CIRCLE_OF_FIFTHS.get(key_a.replace("#", "").replace("b", ""), 0)
-        pos_b = CIRCLE_OF_FIFTHS.get(key_b.replace("#", "").replace("b", ""), 0)
+        pos_a = key_position(key_a)
+        pos_b = key_position(key_b)
 
         distance = abs(pos_a - pos_b)
         distance = min(distance, 12 - distance)
@@ -287,6 +343,14 @@ class CompatibilityEvaluator:
         return recommend_strategy(score, bpm_score, key_score, bpm_a, bpm_b)
 
 
+def key_position(key: str) -> int:
+    """调性在五度圈上的位置，已知调性直接查表"""
+    pos = KEY_POSITIONS.get(key)
+    if pos is None:
+        pos = CIRCLE_OF_FIFTHS.get(key.replace("#", "").replace("b", ""), 0)
+    return pos
+
+
 def evaluate_tracks(track_a_path: str, track_b_path: str) -> dict:
     """
     便捷函数：直接评估两个音频文件
@@ -301,7 +365,6 @@ def evaluate_tracks(track_a_path: str, track_b_path: str) -> dict:
     evaluator = CompatibilityEvaluator()
 
     analyzer = TrackAnalyzer()
-    info_a = analyzer.analyze(track_a_path)
-    info_b = analyzer.analyze(track_b_path)
+    info_a, info_b = run_pair(analyzer.analyze, (track_a_path,), (track_b_path,))
 
     return evaluator.evaluate(info_a, info_b)
@@ -0,0 +1,7 @@
+"""
+核心配置
+"""
+
+# 分析和混音统一使用的采样率（降低采样率以提高速度）；
+# 各模块使用同一个值，同一首歌只需解码、重采样一次，特征缓存也可以共用
+ANALYSIS_SR = 16000
@@ -0,0 +1,170 @@
+"""
+数值小工具模块
+BPM 后处理、节拍置信度、能量曲线扫描、交叉淡化和回声叠加用 numba 编译为原生循环，
+各检测器共用同一份实现
+"""
+
+import math
+
+import numpy as np
+from numba import njit
+
+# 常见音乐的 BPM 范围
+MIN_BPM = 60.0
+MAX_BPM = 200.0
+
+# 判断能量"持续"高于/低于阈值时检查的帧数
+SUSTAIN_FRAMES = 10
+
+
+def normalize_bpm(tempo) -> float:
+    """把 BPM 折叠到 60-200 之间，处理 2x/0.5x 问题（tempo 可以是 librosa 返回的单元素数组）"""
+    return _normalize_bpm(float(np.ravel(tempo)[0]))
+
+
+def beat_confidence(beat_times: np.ndarray) -> float:
+    """根据节拍间隔的变异系数计算节拍置信度 (0-1)，节拍少于 4 个时为 0"""
+    return _beat_confidence(np.ascontiguousarray(beat_times, dtype=np.float64))
+
+
+@njit(cache=True)
+def _normalize_bpm(tempo: float) -> float:
+    # 无节拍（tempo 为 0）或异常值时无法折叠，原样返回
+    if not (0.0 < tempo < np.inf):
+        return tempo
+
+    # 直接算出需要折叠的倍频数，乘除 2 的幂是精确的；
+    # 两次比较只用于修正 log2 的舍入误差，结果与逐次折叠一致
+    if tempo > MAX_BPM:
+        tempo = math.ldexp(tempo, -math.ceil(math.log2(tempo) - math.log2(MAX_BPM)))
+        if tempo > MAX_BPM:
+            tempo /= 2
+        elif tempo * 2 <= MAX_BPM:
+            tempo *= 2
+    elif tempo < MIN_BPM:
+        tempo = math.ldexp(tempo, math.ceil(math.log2(MIN_BPM) - math.log2(tempo)))
+        if tempo < MIN_BPM:
+            tempo *= 2
+        elif tempo / 2 >= MIN_BPM:
+            tempo /= 2
+    return tempo
+
+
+@njit(cache=True, fastmath=True)
+def _beat_confidence(beat_times: np.ndarray) -> float:
+    n = len(beat_times)
+    if n < 4:
+        return 0.0
+
+    # 间隔均值等于首尾之差除以间隔数，一次遍历算出方差
+    mean = (beat_times[n - 1] - beat_times[0]) / (n - 1)
+    if mean <= 0.0:
+        return 0.0
+
+    var = 0.0
+    for i in range(n - 1):
+        d = beat_times[i + 1] - beat_times[i] - mean
+        var += d * d
+    cv = np.sqrt(var / (n - 1)) / mean
+    return max(0.0, 1.0 - cv)
+
+
+@njit(cache=True)
+def sustained_rise_index(values: np.ndarray, threshold: float) -> int:
+    """
+    第一个超过阈值、且从该点起 SUSTAIN_FRAMES 帧均值也超过阈值的位置，
+    没有时返回 -1（其后不足 SUSTAIN_FRAMES + 1 帧的位置不算）
+    """
+    n = len(values)
+    for i in range(n - SUSTAIN_FRAMES):
+        if values[i] > threshold:
+            total = 0.0
+            for j in range(i, i + SUSTAIN_FRAMES):
+                total += values[j]
+            if total / SUSTAIN_FRAMES > threshold:
+                return i
+    return -1
+
+
+@njit(cache=True)
+def sustained_drop_index(values: np.ndarray, threshold: float) -> int:
+    """
+    从后往前第一个低于阈值、且之前 SUSTAIN_FRAMES 帧均值也低于阈值的位置，
+    没有时返回 -1
+    """
+    for i in range(len(values) - 1, SUSTAIN_FRAMES - 1, -1):
+        if values[i] < threshold:
+            total = 0.0
+            for j in range(i - SUSTAIN_FRAMES, i):
+                total += values[j]
+            if total / SUSTAIN_FRAMES < threshold:
+                return i
+    return -1
+
+
+@njit(cache=True)
+def crossfade_mix(
+    out: np.ndarray,
+    a: np.ndarray,
+    fade_out: np.ndarray,
+    b: np.ndarray,
+    fade_in: np.ndarray,
+) -> None:
+    """
+    out[i] = a[i] * fade_out[i] + b[i] * fade_in[i]，一遍写完过渡区
+
+    两个乘积各自按输入的类型计算后再相加，与分开用 numpy 相乘、相加的结果逐位一致
+    """
+    for i in range(len(out)):
+        out[i] = a[i] * fade_out[i] + b[i] * fade_in[i]
+
+
+@njit(cache=True)
+def add_delayed(x: np.ndarray, start: int, end: int, offset: int, gain) -> None:
+    """
+    原地计算 x[start + offset : end + offset] += x[start:end] * gain
+
+    从后往前累加，读到的都是本次更新前的值，与先算出 x[start:end] * gain 再相加的结果一致，
+    不需要临时数组；gain 须与 x 同类型
+    """
+    for j in range(end - 1, start - 1, -1):
+        x[j + offset] += x[j] * gain
+
+
+@njit(cache=True)
+def vocoder_frames(
+    mag: np.ndarray, phase: np.ndarray, rate: float, n_out: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    相位声码器的逐帧部分（算法同 librosa.phase_vocoder），mag、phase 为 (频点, 帧) 的 STFT 幅度和相位
+
+    输出第 t 帧取输入 t * rate 处：幅度在相邻两帧间线性插值，相位累加相邻两帧的相位差。
+    librosa 累加的是“预期增量 + 折回 [-pi, pi] 的偏差”，两者只差 2pi 的整数倍，
+    这里省去折回，并用 float64 累加（librosa 用 float32 累加，高频点的相位很快失去精度）
+
+    Returns:
+        (输出幅度, 输出相位)，均为 (频点, n_out)
+    """
+    n_bins, n_frames = mag.shape
+    mag_out = np.empty((n_bins, n_out), dtype=mag.dtype)
+    phase_out = np.empty((n_bins, n_out), dtype=phase.dtype)
+
+    # 按频点逐行处理，读写都是连续内存
+    for f in range(n_bins):
+        acc = float(phase[f, 0])
+        for t in range(n_out):
+            step = t * rate
+            i = int(step)
+            alpha = step - i
+
+            # 超出末尾的帧按 0 处理
+            m0 = mag[f, i] if i < n_frames else 0.0
+            m1 = mag[f, i + 1] if i + 1 < n_frames else 0.0
+            p0 = phase[f, i] if i < n_frames else 0.0
+            p1 = phase[f, i + 1] if i + 1 < n_frames else 0.0
+
+            mag_out[f, t] = (1.0 - alpha) * m0 + alpha * m1
+            phase_out[f, t] = acc
+            acc += p1 - p0
+
+    return mag_out, phase_out
@@ -2,27 +2,44 @@
 混音引擎模块
 """
 
+import io
 import logging
+import os
+import subprocess
 from pathlib import Path
+from typing import BinaryIO
 
 import librosa
 import numpy as np
+import soundfile as sf
 
 from mixer_core.transition import TransitionFactory
 from mixer_core.transition.beat_sync import stretch_to_target_bpm
-from mixer_core.segment_detector import detect_segments, find_optimal_transition_point
+from mixer_core.segment_detector import detect_segments_from_signal, find_optimal_transition_point
 from mixer_core.compatibility import TrackAnalyzer, CompatibilityEvaluator
+from mixer_core.cache import FeatureCache, cache_path, file_fingerprint
+from mixer_core.config import ANALYSIS_SR
+from mixer_core.buffers import buffer_pool
+from mixer_core.parallel import run_pair
+from mixer_core.fastmath import normalize_bpm
+from mixer_core.spectral import HOP_LENGTH
 
 logger = logging.getLogger(__name__)
 
+# 内存中保留的音频特征条数（每条含完整音频数组，约 15MB/4 分钟）
+FEATURE_CACHE_SIZE = 16
+
 
 class Mixer:
     """混音引擎"""
 
     def __init__(self):
-        self.sr = 16000  # 降低采样率以提高速度
+        self.sr = ANALYSIS_SR
         self.track_analyzer = TrackAnalyzer(self.sr)
         self.compatibility_evaluator = CompatibilityEvaluator(self.sr)
+        self._feature_cache = FeatureCache(
+            cache_path("features", str(self.sr)), maxsize=FEATURE_CACHE_SIZE
+        )
 
     def mix(
         self,
@@ -31,6 +48,10 @@ class Mixer:
         strategy: str = "crossfade",
         output_path: str | None = None,
         transition_duration: float = 10.0,
+        hash_a: str | None = None,
+        hash_b: str | None = None,
+        cache: bool = True,
+        return_audio: bool = False,
     ) -> dict:
         """
         混音两首歌曲
@@ -41,31 +62,39 @@ class Mixer:
             strategy: 过渡策略 (crossfade, beat_sync)
             output_path: 输出路径（可选）
             transition_duration: 过渡持续时间（秒）
+            hash_a: 第一首歌曲的内容哈希（可选，用于特征缓存）
+            hash_b: 第二首歌曲的内容哈希（可选，用于特征缓存）
+            cache: 是否读写特征缓存（只用一次的中间文件不必缓存）
+            return_audio: 是否在结果的 "audio" 中返回混音后的音频数组（采样率为 self.sr）
 
         Returns:
             dict: 混音结果信息
         """
         logger.info(f"开始混音: {track_a_path} -> {track_b_path}, 策略: {strategy}")
 
-        # 加载音频
-        y_a, sr_a = librosa.load(track_a_path, sr=self.sr)
-        y_b, sr_b = librosa.load(track_b_path, sr=self.sr)
+        # 加载音频并提取特征（每首歌只解码、检测节拍一次，两首并行）
+        features_a, features_b = run_pair(
+            self._load_features, (track_a_path, hash_a, cache), (track_b_path, hash_b, cache)
+        )
+
+        y_a = features_a["y"]
+        y_b = features_b["y"]
 
-        # 检测 BPM 和节拍
-        bpm_a, beats_a = self._detect_bpm_and_beats(track_a_path)
-        bpm_b, beats_b = self._detect_bpm_and_beats(track_b_path)
+        # BPM 和节拍（节拍时间保持为 float64 数组，直接交给过渡策略）
+        bpm_a, beats_a = features_a["bpm"], features_a["beats"]
+        bpm_b, beats_b = features_b["bpm"], features_b["beats"]
 
         logger.info(f"检测到 BPM: {track_a_path} = {bpm_a:.1f}, {track_b_path} = {bpm_b:.1f}")
 
-        compatibility_result = self.evaluate_compatibility(track_a_path, track_b_path)
+        compatibility_result = self._evaluate_infos(features_a["info"], features_b["info"])
 
         key_a = compatibility_result.get("key_a", "C")
         key_b = compatibility_result.get("key_b", "C")
         logger.info(f"检测到调性: {key_a} -> {key_b}")
 
-        # 检测歌曲结构（前奏/尾奏）
-        seg_a = detect_segments(track_a_path, self.sr)
-        seg_b = detect_segments(track_b_path, self.sr)
+        # 歌曲结构（前奏/尾奏）
+        seg_a = features_a["segments"]
+        seg_b = features_b["segments"]
 
         logger.info(
             f"歌曲A结构: 前奏结束={seg_a['intro_end']:.1f}s, 尾奏开始={seg_a['outro_start']:.1f}s"
@@ -189,6 +218,8 @@ class Mixer:
             },
             "compatibility": compatibility_result,
         }
+        if return_audio:
+            result["audio"] = y_mixed
 
         return result
 
@@ -209,6 +240,81 @@ class Mixer:
         info_a = self.track_analyzer.analyze(track_a_path)
         info_b = self.track_analyzer.analyze(track_b_path)
 
+        return self._evaluate_infos(info_a, info_b)
+
+    def evaluate_compatibility_bytes(
+        self,
+        buf_a: bytes,
+        buf_b: bytes,
+        hash_a: str | None = None,
+        hash_b: str | None = None,
+    ) -> dict:
+        """
+        评估两首歌曲的兼容性（直接分析内存中的音频数据，不写临时文件）
+
+        Args:
+            buf_a: 第一首歌曲的原始文件数据
+            buf_b: 第二首歌曲的原始文件数据
+            hash_a: 第一首歌曲的内容哈希（可选，用于特征缓存）
+            hash_b: 第二首歌曲的内容哈希（可选，用于特征缓存）
+
+        Returns:
+            dict: 兼容性评估结果
+        """
+        logger.info(f"评估兼容性(内存): {len(buf_a)} bytes <-> {len(buf_b)} bytes")
+
+        # 提取完整特征并缓存，随后对同一文件的混音无需重新分析
+        features_a, features_b = run_pair(
+            self._load_features, (io.BytesIO(buf_a), hash_a), (io.BytesIO(buf_b), hash_b)
+        )
+
+        return self._evaluate_infos(features_a["info"], features_b["info"])
+
+    def _load_features(
+        self, audio: str | BinaryIO, content_hash: str | None = None, cache: bool = True
+    ) -> dict:
+        """
+        加载音频并提取混音所需的全部特征，按 content_hash 缓存；
+        未提供哈希的本地文件使用文件指纹（如 CLI 重复混音同一首歌时）
+
+        Returns:
+            dict: y（音频信号）、bpm、beats（节拍时间）、info（兼容性特征）、segments（歌曲结构）
+        """
+        if not cache:
+            content_hash = None
+        elif not content_hash and isinstance(audio, (str, os.PathLike)):
+            content_hash = file_fingerprint(audio)
+
+        if content_hash:
+            features = self._feature_cache.get(content_hash)
+            if features is not None:
+                logger.info(f"特征缓存命中: {content_hash[:12]}")
+                return features
+
+        y, _ = librosa.load(audio, sr=self.sr)
+        features = self.extract_features(y)
+
+        if content_hash:
+            self._feature_cache.put(content_hash, features)
+        return features
+
+    def extract_features(self, y: np.ndarray) -> dict:
+        """从已加载的音频信号（采样率为 self.sr）提取特征，字段同 _load_features"""
+        sr = self.sr
+        # 兼容性特征（含 BPM）与 TrackAnalyzer.analyze 一样取分析片段，节拍按同一 BPM 跟踪全曲
+        info, beat_frames = self.track_analyzer.analyze_track(y, sr)
+        beat_times = librosa.frames_to_time(beat_frames, sr=sr, hop_length=HOP_LENGTH)
+
+        return {
+            "y": y,
+            "bpm": info["bpm"],
+            "beats": beat_times,
+            "info": info,
+            "segments": detect_segments_from_signal(y, sr, beat_times),
+        }
+
+    def _evaluate_infos(self, info_a: dict, info_b: dict) -> dict:
+        """根据两首歌曲的特征评估兼容性"""
         # 评估兼容性
         result = self.compatibility_evaluator.evaluate(info_a, info_b)
 
@@ -218,25 +324,22 @@ class Mixer:
 
         return result
 
-    def _detect_bpm_and_beats(self, audio_path: str) -> tuple[float, list[float]]:
-        """检测音频 BPM 和节拍位置"""
-        y, sr = librosa.load(audio_path, sr=self.sr)
+    def _detect_bpm_and_beats(self, y: np.ndarray, sr: int) -> tuple[float, np.ndarray]:
+        """检测已加载音频的 BPM 和节拍位置"""
         tempo, beat_frames = librosa.beat.beat_track(y=y, sr=sr)
 
         # 后处理：处理 2x/0.5x 问题
-        while tempo > 200:
-            tempo /= 2
-        while tempo < 60:
-            tempo *= 2
+        tempo = normalize_bpm(tempo)
 
         # 转换为时间（秒）
         beat_times = librosa.frames_to_time(beat_frames, sr=sr)
 
-        return float(tempo), beat_times.tolist()
+        return tempo, beat_times
 
     def _detect_bpm(self, audio_path: str) -> float:
         """检测音频 BPM（兼容旧接口）"""
-        bpm, _ = self._detect_bpm_and_beats(audio_path)
+        y, sr = librosa.load(audio_path, sr=self.sr)
+        bpm, _ = self._detect_bpm_and_beats(y, sr)
         return bpm
 
     def _can_beat_sync(
@@ -265,24 +368,60 @@ class Mixer:
         return False, stretch_ratio
 
     def _normalize(self, audio: np.ndarray) -> np.ndarray:
-        """归一化音频，避免爆音"""
-        max_val = np.abs(audio).max()
+        """归一化音频，避免爆音（原地缩放，audio 须为过渡策略新生成的数组）"""
+        # 不经过 np.abs，避免分配整首歌大小的临时数组
+        max_val = max(audio.max(), -audio.min())
         if max_val > 1.0:
-            audio = audio / max_val * 0.95
+            # 原地先除后乘，与 audio / max_val * 0.95 结果一致，但不产生临时数组
+            np.divide(audio, max_val, out=audio)
+            np.multiply(audio, 0.95, out=audio)
         return audio
 
     def _save(self, audio: np.ndarray, sr: int, output_path: str):
-        """保存音频文件"""
-        # 转换 float32 到 int16
-        audio_int16 = (audio * 32767).astype(np.int16)
-
-        # 使用 pydub 保存
-        from pydub import AudioSegment
-
-        audio_segment = AudioSegment(
-            audio_int16.tobytes(),
-            frame_rate=sr,
-            sample_width=2,
-            channels=1,
-        )
-        audio_segment.export(output_path, format="mp3")
+        """
+        保存音频文件：MP3 由 PCM 经管道直接送入 ffmpeg 编码，不写中间 WAV 文件；
+        .wav 路径保存为 32 位浮点 WAV，供需要再次处理的中间结果使用，不经有损编码
+        """
+        if Path(output_path).suffix.lower() == ".wav":
+            sf.write(output_path, audio, sr, subtype="FLOAT")
+            return
+
+        from pydub.utils import get_encoder_name
+
+        command = [
+            get_encoder_name(),
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "s16le",
+            "-ar",
+            str(sr),
+            "-ac",
+            "1",
+            "-i",
+            "pipe:0",
+            "-f",
+            "mp3",
+            output_path,
+        ]
+
+        # 转换 float 到 int16（中间结果都放在缓冲池的数组中）；
+        # 先限幅再转换，超出 [-1, 1] 的样本饱和而不是整数回绕成爆音
+        with (
+            buffer_pool.borrow(len(audio), np.float32) as scaled,
+            buffer_pool.borrow(len(audio), np.int16) as audio_int16,
+        ):
+            np.multiply(audio, 32767, out=scaled)
+            np.clip(scaled, -32767, 32767, out=scaled)
+            np.copyto(audio_int16, scaled, casting="unsafe")
+            try:
+                subprocess.run(
+                    command,
+                    input=memoryview(audio_int16).cast("B"),
+                    capture_output=True,
+                    check=True,
+                )
+            except subprocess.CalledProcessError as e:
+                stderr = e.stderr.decode(errors="replace").strip()
+                raise RuntimeError(f"MP3 编码失败: {stderr}") from e
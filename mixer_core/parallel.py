@@ -0,0 +1,30 @@
+"""
+并行工具模块
+两首歌的解码和分析互不依赖，放在两个线程中同时进行；
+多进程批量分析时限制每个进程的 BLAS 线程数
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+def run_pair(func, args_a: tuple, args_b: tuple) -> tuple:
+    """
+    并行执行 func(*args_a) 和 func(*args_b)，按顺序返回两个结果
+
+    args_a 在后台线程执行，args_b 在当前线程执行；音频解码、重采样和 FFT
+    都会释放 GIL，两边可以真正重叠。每次调用新建线程池，
+    避免模块级线程池在 fork 出的工作进程中失效
+    """
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="decode") as pool:
+        future = pool.submit(func, *args_a)
+        result_b = func(*args_b)
+        return future.result(), result_b
+
+
+def limit_blas_threads() -> None:
+    """工作进程初始化：每个进程只用一个 BLAS 线程，避免多进程时线程数超过核数"""
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    threadpool_limits(1)
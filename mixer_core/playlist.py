@@ -4,15 +4,24 @@
 """
 
 import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import pairwise
 from pathlib import Path
 
 import librosa
 import numpy as np
+from librosa.util.exceptions import ParameterError
 
 from mixer_core.mixer import Mixer
+from mixer_core.parallel import limit_blas_threads
 
 logger = logging.getLogger(__name__)
 
+# 预分析工作进程内的 Mixer 实例
+_worker_mixer = None
+
 
 class PlaylistMixer:
     """播放列表混音器"""
@@ -26,6 +35,7 @@ class PlaylistMixer:
         strategy: str = "crossfade",
         output_path: str | None = None,
         transition_duration: float = 5.0,
+        max_workers: int | None = None,
     ) -> dict:
         """
         混音播放列表中的所有歌曲
@@ -35,6 +45,7 @@ class PlaylistMixer:
             strategy: 过渡策略
             output_path: 输出路径
             transition_duration: 每两首歌曲之间的过渡时间
+            max_workers: 预分析和逐对混音的进程数，默认为 CPU 核数；为 1 时在本进程中依次混音
 
         Returns:
             dict: 混音结果
@@ -45,11 +56,8 @@ class PlaylistMixer:
         if len(track_paths) == 1:
             # 只有一首歌曲，直接复制
             logger.info("播放列表只有一首歌曲，直接复制")
-            y, sr = librosa.load(track_paths[0], sr=22050)
-            from mixer_core.mixer import Mixer
-
-            m = Mixer()
-            m._save(y, sr, output_path)
+            y, sr = librosa.load(track_paths[0], sr=self.mixer.sr)
+            self.mixer._save(y, sr, output_path)
             return {
                 "track_count": 1,
                 "duration": len(y) / sr,
@@ -59,69 +67,53 @@ class PlaylistMixer:
 
         logger.info(f"开始播放列表混音: {len(track_paths)} 首歌曲")
 
-        # 加载第一首歌曲
-        y_all, sr = librosa.load(track_paths[0], sr=22050)
-        first_duration = len(y_all) / sr
-
-        transitions = []
-
-        # 依次混音每两首歌曲
-        for i in range(1, len(track_paths)):
-            track_a = track_paths[i - 1]
-            track_b = track_paths[i]
-
-            logger.info(
-                f"混音第 {i}/{len(track_paths) - 1}: {Path(track_a).name} -> {Path(track_b).name}"
-            )
-
-            # 临时输出
-            temp_output = f"/tmp/playlist_temp_{i}.mp3"
-
-            # 混音
-            result = self.mixer.mix(
-                track_a,
-                track_b,
-                strategy=strategy,
-                output_path=temp_output,
-                transition_duration=transition_duration,
-            )
-
-            transitions.append(
-                {
-                    "from": Path(track_a).name,
-                    "to": Path(track_b).name,
-                    "transition_point": result["transition_point"],
-                    "strategy": result["strategy"],
-                }
-            )
-
-            # 加载混音结果并追加到主音频
-            y_mixed, _ = librosa.load(temp_output, sr=sr)
-
-            # 找到第二首歌曲开始的位置（过渡点之后）
-            # 简单处理：直接拼接（已经有过渡处理了）
-            # 实际上混音结果已经包含了完整的过渡，所以我们只需要取前一首歌曲的全部
-            # 然后追加第二首歌曲超出过渡区的部分
-
-            # 获取原始两首歌曲
-            y_a_orig, _ = librosa.load(track_a, sr=sr)
-            y_b_orig, _ = librosa.load(track_b, sr=sr)
-
-            # 重新混音，使用更简单的方式
-            # 获取第一首歌曲的前半部分 + 混音结果的后半部分
-            transition_sample = int(result["transition_point"] * sr)
-
-            # 构建新的结果：保留第一首到过渡点，然后接第二首
-            # 这里简化处理，直接使用混音结果
-            y_all = y_mixed
-
-            # 清理临时文件
-            import os
-
-            if os.path.exists(temp_output):
-                os.remove(temp_output)
-
-        # 保存最终结果
+        sr = self.mixer.sr
+
+        pairs = list(pairwise(track_paths))
+        tracks = list(dict.fromkeys(track_paths))
+        max_workers = min(max_workers or os.cpu_count() or 1, len(tracks))
+
+        if max_workers > 1:
+            with ProcessPoolExecutor(max_workers, initializer=limit_blas_threads) as executor:
+                # 先在多个进程中分析全部歌曲并写入特征缓存，逐对混音时直接读取
+                logger.info(f"预分析 {len(tracks)} 首歌曲（{max_workers} 个进程）")
+                futures = [executor.submit(_cache_features, track) for track in tracks]
+                for track, future in zip(tracks, futures):
+                    try:
+                        future.result()
+                    except (OSError, ParameterError, BrokenProcessPool):
+                        # 预分析失败只记录日志，留给混音阶段处理
+                        logger.exception(f"预分析失败: {track}")
+
+                # 各对混音互不依赖：除最后一对外都在工作进程中混音（只回传结果信息，
+                # 不回传音频），最后一对在本进程中混音并返回音频
+                futures = [
+                    executor.submit(_mix_pair_info, a, b, strategy, transition_duration)
+                    for a, b in pairs[:-1]
+                ]
+                last = self._mix_pair(*pairs[-1], strategy, transition_duration)
+                results = [f.result() for f in futures] + [last]
+        else:
+            # 依次混音每两首歌曲
+            results = [
+                self._mix_pair(a, b, strategy, transition_duration, return_audio=(i == len(pairs)))
+                for i, (a, b) in enumerate(pairs, 1)
+            ]
+
+        transitions = [
+            {
+                "from": Path(a).name,
+                "to": Path(b).name,
+                "transition_point": result["transition_point"],
+                "strategy": result["strategy"],
+            }
+            for (a, b), result in zip(pairs, results)
+        ]
+
+        # 混音结果已经包含了完整的过渡，直接使用
+        y_all = results[-1].pop("audio")
+
+        # 保存最终结果（只在最后编码一次）
         if output_path:
             self.mixer._save(y_all, sr, output_path)
             logger.info(f"播放列表混音完成: {output_path}")
@@ -137,6 +129,50 @@ class PlaylistMixer:
             "transitions": transitions,
         }
 
+    def _mix_pair(
+        self,
+        track_a: str,
+        track_b: str,
+        strategy: str,
+        transition_duration: float,
+        return_audio: bool = True,
+    ) -> dict:
+        """
+        混音相邻的两首歌曲
+
+        混音结果直接以数组返回，不写临时文件再读回；只有最后一对的结果会被保存，
+        之前各对不返回音频，同一时刻最多只保留一份混音结果
+        （每首歌的特征按文件指纹缓存，作为下一对的歌曲A时不再重新分析）
+        """
+        logger.info(f"混音: {Path(track_a).name} -> {Path(track_b).name}")
+        return self.mixer.mix(
+            track_a,
+            track_b,
+            strategy=strategy,
+            transition_duration=transition_duration,
+            return_audio=return_audio,
+        )
+
+
+def _get_worker_mixer() -> Mixer:
+    global _worker_mixer
+    if _worker_mixer is None:
+        _worker_mixer = Mixer()
+    return _worker_mixer
+
+
+def _cache_features(path: str) -> None:
+    """工作进程：分析单首歌曲并写入特征缓存（不回传音频数据）"""
+    _get_worker_mixer()._load_features(path)
+
+
+def _mix_pair_info(track_a: str, track_b: str, strategy: str, transition_duration: float) -> dict:
+    """工作进程：混音相邻的两首歌曲，只回传结果信息（不回传音频数据）"""
+    logger.info(f"混音: {Path(track_a).name} -> {Path(track_b).name}")
+    return _get_worker_mixer().mix(
+        track_a, track_b, strategy=strategy, transition_duration=transition_duration
+    )
+
 
 def scan_playlist(folder_path: str) -> list[str]:
     """扫描文件夹获取播放列表（按文件名排序）"""
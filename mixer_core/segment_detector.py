@@ -9,10 +9,13 @@ import logging
 import librosa
 import numpy as np
 
+from mixer_core.config import ANALYSIS_SR
+from mixer_core.fastmath import sustained_drop_index, sustained_rise_index
+
 logger = logging.getLogger(__name__)
 
 
-def detect_segments(audio_path: str, sr: int = 16000) -> dict:
+def detect_segments(audio_path: str, sr: int = ANALYSIS_SR) -> dict:
     """
     检测歌曲结构：前奏、主歌、副歌、尾奏
 
@@ -22,21 +25,39 @@ def detect_segments(audio_path: str, sr: int = 16000) -> dict:
     logger.info(f"开始歌曲结构分析: {audio_path}")
 
     y, sr = librosa.load(audio_path, sr=sr)
+    return detect_segments_from_signal(y, sr)
+
+
+def detect_segments_from_signal(
+    y: np.ndarray, sr: int, beat_times: np.ndarray | None = None
+) -> dict:
+    """
+    对已加载的音频检测歌曲结构
+
+    Args:
+        y: 音频信号
+        sr: 采样率
+        beat_times: 已检测的节拍时间（秒），为空时重新检测
+    """
     duration = len(y) / sr
 
     # 方法1：基于能量的段落检测
     energy_curve = compute_energy_curve(y, sr)
     energy_times = np.linspace(0, duration, len(energy_curve))
 
+    # 前奏和尾奏检测共用同一条平滑后的能量曲线
+    energy_smooth = smooth_energy(energy_curve) if len(energy_curve) >= 10 else None
+
     # 检测前奏结束位置（能量开始上升的点）
-    intro_end = detect_intro_end(energy_curve, sr)
+    intro_end = detect_intro_end(energy_curve, sr, energy_smooth=energy_smooth)
 
     # 检测尾奏开始位置（能量开始持续下降的点）
-    outro_start = detect_outro_start(energy_curve, sr, duration)
+    outro_start = detect_outro_start(energy_curve, sr, duration, energy_smooth=energy_smooth)
 
     # 获取节拍信息用于 downbeat 对齐
-    tempo, beat_frames = librosa.beat.beat_track(y=y, sr=sr)
-    beat_times = librosa.frames_to_time(beat_frames, sr=sr)
+    if beat_times is None:
+        _, beat_frames = librosa.beat.beat_track(y=y, sr=sr)
+        beat_times = librosa.frames_to_time(beat_frames, sr=sr)
 
     # 获取 downbeats（每小节第一拍）
     downbeats = beat_times[::4] if len(beat_times) >= 4 else beat_times
@@ -79,24 +100,54 @@ def detect_segments(audio_path: str, sr: int = 16000) -> dict:
     return result
 
 
+def snap_to_grid(times, grid: np.ndarray, side: str = "nearest") -> np.ndarray:
+    """
+    把一个或一批时间点对齐到升序网格（节拍、downbeat 等）上，一次二分查找完成
+
+    Args:
+        times: 时间点（标量或数组）
+        grid: 升序排列的网格
+        side: before（不晚于该点的最后一个，没有时取第一个）、
+            after（不早于该点的第一个，没有时取最后一个）、
+            nearest（最近的一个，距离相同时取较早的）
+
+    Returns:
+        对齐后的时间点，形状与 times 相同；网格为空时原样返回
+    """
+    times = np.asarray(times)
+    grid = np.asarray(grid)
+    if len(grid) == 0:
+        return times
+
+    last = len(grid) - 1
+    if side == "before":
+        idx = np.searchsorted(grid, times, side="right") - 1
+        return grid[np.clip(idx, 0, last)]
+    if side == "after":
+        idx = np.searchsorted(grid, times, side="left")
+        return grid[np.minimum(idx, last)]
+    if side != "nearest":
+        raise ValueError(f"未知对齐方式: {side}")
+
+    # 比较左右两个相邻网格点，距离相同时取左边（较早）的
+    right = np.minimum(np.searchsorted(grid, times, side="left"), last)
+    left = np.maximum(right - 1, 0)
+    use_right = np.abs(grid[right] - times) < np.abs(times - grid[left])
+    return np.where(use_right, grid[right], grid[left])
+
+
 def find_nearest_downbeat_before(target_time: float, downbeats: np.ndarray) -> float:
     """找到目标时间之前的最近 downbeat"""
     if len(downbeats) == 0:
         return target_time
-    candidates = downbeats[downbeats <= target_time]
-    if len(candidates) > 0:
-        return float(candidates[-1])
-    return float(downbeats[0])
+    return float(snap_to_grid(target_time, downbeats, "before"))
 
 
 def find_nearest_downbeat_after(target_time: float, downbeats: np.ndarray) -> float:
     """找到目标时间之后的最近 downbeat"""
     if len(downbeats) == 0:
         return target_time
-    candidates = downbeats[downbeats >= target_time]
-    if len(candidates) > 0:
-        return float(candidates[0])
-    return float(downbeats[-1])
+    return float(snap_to_grid(target_time, downbeats, "after"))
 
 
 def find_energy_matching_point(
@@ -129,66 +180,101 @@ def compute_energy_curve(
     y: np.ndarray, sr: int, frame_length: int = 2048, hop_length: int = 512
 ) -> np.ndarray:
     """计算音频能量曲线"""
-    energy = np.array(
-        [np.sum(y[i : i + frame_length] ** 2) for i in range(0, len(y) - frame_length, hop_length)]
-    )
+    energy = frame_energy(y, frame_length, hop_length)
     # 归一化
     energy = energy / (energy.max() + 1e-10)
     return energy
 
 
-def detect_intro_end(energy: np.ndarray, sr: int, threshold: float = 0.25) -> float:
+def smooth_energy(energy: np.ndarray) -> np.ndarray:
+    """
+    能量曲线的移动平均（窗口为曲线长度的 1/10，最多 50 帧），
+    等同于 np.convolve(..., mode="valid")，用累加和相减代替逐窗口求和
+    """
+    window = _smooth_window(len(energy))
+    csum = np.concatenate(([0.0], np.cumsum(energy, dtype=np.float64)))
+    return (csum[window:] - csum[:-window]) / window
+
+
+def _smooth_window(n_frames: int) -> int:
+    return min(50, n_frames // 10)
+
+
+def frame_energy(y: np.ndarray, frame_length: int = 2048, hop_length: int = 512) -> np.ndarray:
+    """
+    逐帧能量（样本平方和），帧起点为 range(0, len(y) - frame_length, hop_length)
+
+    在滑动窗口视图上一次算出所有帧的平方和，不逐帧切片，也不生成 y ** 2 临时数组
+    """
+    n_frames = len(range(0, len(y) - frame_length, hop_length))
+    if n_frames <= 0:
+        return np.zeros(0, dtype=y.dtype)
+    frames = np.lib.stride_tricks.sliding_window_view(y, frame_length)[::hop_length]
+    frames = frames[:n_frames]
+    return np.einsum("ij,ij->i", frames, frames)
+
+
+def detect_intro_end(
+    energy: np.ndarray,
+    sr: int,
+    threshold: float = 0.25,
+    energy_smooth: np.ndarray | None = None,
+) -> float:
     """
     检测前奏结束位置
     原理：前奏能量较低，当能量持续上升超过阈值时，认为前奏结束
+
+    energy_smooth 为 smooth_energy(energy) 的结果，已计算时传入可避免重复计算
     """
     if len(energy) < 10:
         return 0.0
 
     # 计算能量的移动平均
-    window = min(50, len(energy) // 10)
-    energy_smooth = np.convolve(energy, np.ones(window) / window, mode="valid")
+    window = _smooth_window(len(energy))
+    if energy_smooth is None:
+        energy_smooth = smooth_energy(energy)
 
     # 找到能量首次持续超过阈值的位置
     hop_length = 512
-    for i in range(len(energy_smooth)):
-        if energy_smooth[i] > threshold:
-            # 检查是否持续
-            if i + 10 < len(energy_smooth):
-                if np.mean(energy_smooth[i : i + 10]) > threshold:
-                    return (i + window) * hop_length / sr
+    i = sustained_rise_index(energy_smooth, threshold)
+    if i >= 0:
+        return (i + window) * hop_length / sr
 
     return 0.0
 
 
 def detect_outro_start(
-    energy: np.ndarray, sr: int, duration: float, threshold: float = 0.25
+    energy: np.ndarray,
+    sr: int,
+    duration: float,
+    threshold: float = 0.25,
+    energy_smooth: np.ndarray | None = None,
 ) -> float:
     """
     检测尾奏开始位置
     原理：尾奏能量持续下降，当能量持续低于阈值时，认为尾奏开始
+
+    energy_smooth 同 detect_intro_end
     """
     if len(energy) < 10:
         return duration
 
     # 计算能量的移动平均
-    window = min(50, len(energy) // 10)
-    energy_smooth = np.convolve(energy, np.ones(window) / window, mode="valid")
+    window = _smooth_window(len(energy))
+    if energy_smooth is None:
+        energy_smooth = smooth_energy(energy)
 
     # 从后往前找能量首次持续低于阈值的位置
-    for i in range(len(energy_smooth) - 1, -1, -1):
-        if energy_smooth[i] < threshold:
-            # 检查是否持续
-            if i - 10 >= 0:
-                if np.mean(energy_smooth[i - 10 : i]) < threshold:
-                    hop_length = 512
-                    return min((i + window) * hop_length / sr, duration)
+    i = sustained_drop_index(energy_smooth, threshold)
+    if i >= 0:
+        hop_length = 512
+        return min((i + window) * hop_length / sr, duration)
 
     return duration
 
 
 def find_optimal_transition_point(
-    audio_a_path: str, audio_b_path: str, transition_duration: float = 5.0, sr: int = 22050
+    audio_a_path: str, audio_b_path: str, transition_duration: float = 5.0, sr: int = ANALYSIS_SR
 ) -> tuple[float, float]:
     """
     找到最佳过渡点（带 Downbeat 对齐）
@@ -0,0 +1,65 @@
+"""
+频谱特征模块
+节拍检测的 onset 包络和调性检测的色度向量共用同一次 STFT
+"""
+
+import librosa
+import numpy as np
+
+# STFT 窗长和帧移（与 librosa.beat.beat_track 默认值一致）
+N_FFT = 2048
+HOP_LENGTH = 512
+
+# 色度每隔一帧取一次（帧移 1024）
+CHROMA_STEP = 2
+
+# 每块的帧数（16kHz 下约 33 秒），须为 CHROMA_STEP 的倍数
+BLOCK_FRAMES = 1024
+
+
+def onset_and_chroma(
+    y: np.ndarray, sr: int, chroma_frames: tuple[int, int] | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    一次 STFT 同时得到 onset 包络和时间平均的色度向量
+
+    onset 包络与 onset_strength(y=y, sr=sr, aggregate=np.median)（beat_track 内部的算法）一致，
+    可直接传给 beat_track(onset_envelope=...)；色度为帧移 1024 的 chroma_stft 的帧平均，
+    chroma_frames 为 (起始帧, 结束帧) 时只平均这一段（帧号同 onset 包络）
+
+    按块计算 STFT，不为整首歌保留完整频谱，只保留 mel 频谱
+
+    Returns:
+        (onset_env, chroma_mean)
+    """
+    # 与 center=True 的分帧一致：两端各补 n_fft/2 个零，块之间帧不重复
+    y_pad = np.pad(y, N_FFT // 2)
+    n_frames = 1 + (len(y_pad) - N_FFT) // HOP_LENGTH
+    chroma_lo, chroma_hi = chroma_frames or (0, n_frames)
+
+    mel_basis = librosa.filters.mel(sr=sr, n_fft=N_FFT)
+    mel = np.empty((len(mel_basis), n_frames), dtype=y.dtype)
+    chroma_sum = np.zeros(12)
+    n_chroma = 0
+
+    for start in range(0, n_frames, BLOCK_FRAMES):
+        stop = min(start + BLOCK_FRAMES, n_frames)
+        block = y_pad[start * HOP_LENGTH : (stop - 1) * HOP_LENGTH + N_FFT]
+        power = np.abs(librosa.stft(block, n_fft=N_FFT, hop_length=HOP_LENGTH, center=False)) ** 2
+
+        mel[:, start:stop] = np.einsum("ft,mf->mt", power, mel_basis, optimize=True)
+
+        # 块起点为 CHROMA_STEP 的倍数，块内第 k 个色度帧对应第 start + k * CHROMA_STEP 帧
+        first = max(0, -(-(chroma_lo - start) // CHROMA_STEP))
+        last = -(-(min(stop, chroma_hi) - start) // CHROMA_STEP)
+        if first < last:
+            chroma = librosa.feature.chroma_stft(
+                S=power[:, ::CHROMA_STEP][:, first:last], sr=sr, n_fft=N_FFT
+            )
+            chroma_sum += chroma.sum(axis=1)
+            n_chroma += chroma.shape[1]
+
+    onset_env = librosa.onset.onset_strength(
+        S=librosa.power_to_db(mel), sr=sr, hop_length=HOP_LENGTH, aggregate=np.median
+    )
+    return onset_env, chroma_sum / n_chroma
@@ -2,11 +2,16 @@
 过渡策略模块
 """
 
+import importlib
 from abc import ABC, abstractmethod
+from functools import lru_cache
 
-import librosa
 import numpy as np
 
+from mixer_core.buffers import buffer_pool
+from mixer_core.fastmath import crossfade_mix
+from mixer_core.segment_detector import frame_energy, snap_to_grid
+
 
 class TransitionStrategy(ABC):
     """过渡策略基类"""
@@ -49,7 +54,7 @@ class TransitionStrategy(ABC):
 
 
 def detect_silence(
-    audio: np.ndarray, sr: int, threshold_db: float = -40.0
+    audio: np.ndarray, sr: int, threshold_db: float = -40.0, seek_step: int = 1
 ) -> list[tuple[int, int]]:
     """
     检测音频中的静音段
@@ -58,78 +63,97 @@ def detect_silence(
         audio: 音频数据
         sr: 采样率
         threshold_db: 静音阈值（分贝）
+        seek_step: 粗扫的帧步长；大于 1 时先每隔 seek_step 帧判断一次，
+            只在状态变化处逐帧细查（短于 seek_step 帧的静音段/非静音段可能被忽略）
 
     Returns:
         [(start_sample, end_sample), ...] 静音段列表
     """
-    # 计算帧能量
-    frame_length = 2048
     hop_length = 512
-    energy = np.array(
-        [
-            np.sum(audio[i : i + frame_length] ** 2)
-            for i in range(0, len(audio) - frame_length, hop_length)
-        ]
-    )
-
-    # 转换为分贝
-    energy_db = 10 * np.log10(energy + 1e-10)
+    silent_frames = _silent_frames(audio, threshold_db, seek_step)
 
-    # 找出静音帧
-    silent_frames = energy_db < threshold_db
+    # 静音段的起止帧：前后补一个非静音帧后做差分，+1 处进入静音，-1 处离开静音
+    edges = np.diff(np.concatenate(([0], silent_frames.astype(np.int8), [0])))
+    start_frames = np.flatnonzero(edges == 1)
+    end_frames = np.flatnonzero(edges == -1)
 
-    # 找出静音段的起始和结束
-    silence_segments = []
-    in_silence = False
-    start_frame = 0
-
-    for i, is_silent in enumerate(silent_frames):
-        if is_silent and not in_silence:
-            start_frame = i
-            in_silence = True
-        elif not is_silent and in_silence:
-            start_sample = start_frame * hop_length
-            end_sample = i * hop_length
-            silence_segments.append((start_sample, end_sample))
-            in_silence = False
+    silence_segments = [
+        (int(start) * hop_length, int(end) * hop_length)
+        for start, end in zip(start_frames, end_frames)
+    ]
 
     # 处理末尾的静音
-    if in_silence:
-        start_sample = start_frame * hop_length
-        end_sample = len(audio)
-        silence_segments.append((start_sample, end_sample))
+    if silence_segments and end_frames[-1] == len(silent_frames):
+        silence_segments[-1] = (silence_segments[-1][0], len(audio))
 
     return silence_segments
 
 
-def find_nearest_beat(transition_point: int, beats: list[float], sr: int) -> int:
+def _silent_frames(
+    audio: np.ndarray,
+    threshold_db: float,
+    seek_step: int = 1,
+    frame_length: int = 2048,
+    hop_length: int = 512,
+) -> np.ndarray:
+    """逐帧判断是否静音，帧同 segment_detector.frame_energy"""
+
+    def is_silent(segment: np.ndarray, hop: int) -> np.ndarray:
+        energy = frame_energy(segment, frame_length, hop)
+        return 10 * np.log10(energy + 1e-10) < threshold_db
+
+    if seek_step <= 1:
+        return is_silent(audio, hop_length)
+
+    # 粗扫：只算第 0、seek_step、2*seek_step ... 帧，其余帧先沿用前一个粗扫帧的状态
+    n_frames = len(range(0, len(audio) - frame_length, hop_length))
+    coarse = is_silent(audio, hop_length * seek_step)
+    silent = np.repeat(coarse, seek_step)[:n_frames]
+
+    # 状态变化的两个粗扫帧之间，以及最后一个粗扫帧之后，逐帧重新判断
+    coarse_idx = np.arange(len(coarse)) * seek_step
+    lows = coarse_idx[np.flatnonzero(coarse[1:] != coarse[:-1])] + 1
+    if len(coarse_idx) and coarse_idx[-1] + 1 < n_frames:
+        lows = np.append(lows, coarse_idx[-1] + 1)
+    for lo in lows:
+        hi = min(lo + seek_step - 1, n_frames)
+        segment = audio[lo * hop_length : (hi - 1) * hop_length + frame_length + 1]
+        silent[lo:hi] = is_silent(segment, hop_length)
+    return silent
+
+
+def skip_leading_silence(audio: np.ndarray, sr: int, start: int, window: int) -> int:
+    """
+    audio 从 start 处开始为静音时，返回静音结束的位置，否则原样返回 start
+    （只检查 start 之后 window 个样本）
+    """
+    segments = detect_silence(audio[start : start + window], sr)
+    if segments and segments[0][0] == 0:
+        return start + segments[0][1]
+    return start
+
+
+def find_nearest_beat(transition_point: int, beats: list[float] | np.ndarray, sr: int) -> int:
     """
     找到最近的节拍点
 
     Args:
         transition_point: 目标过渡点（样本）
-        beats: 节拍时间列表（秒）
+        beats: 节拍时间列表或数组（秒）
         sr: 采样率
 
     Returns:
         调整后的过渡点（样本）
     """
-    if not beats:
+    if beats is None or len(beats) == 0:
         return transition_point
 
-    # 转换节拍时间为样本位置
-    beat_samples = [int(b * sr) for b in beats]
-
-    # 找到最近的节拍
-    closest_beat = min(beat_samples, key=lambda b: abs(b - transition_point))
+    # 转换节拍时间为样本位置（向零取整，同 int()）
+    beat_samples = (np.asarray(beats, dtype=np.float64) * sr).astype(np.int64)
 
-    # 确保在有效范围内
-    if closest_beat < 0:
-        closest_beat = beat_samples[0]
-    if closest_beat > len(beats) * sr:
-        closest_beat = beat_samples[-1]
-
-    return closest_beat
+    # 找到最近的节拍（节拍按时间升序，二分查找；距离相同时取较早的）
+    # 结果本身就是 beat_samples 中的一个点，无需再做范围修正
+    return int(snap_to_grid(transition_point, beat_samples, "nearest"))
 
 
 def smooth_fade_curve(n_samples: int, curve_type: str = "sigmoid") -> np.ndarray:
@@ -143,7 +167,8 @@ def smooth_fade_curve(n_samples: int, curve_type: str = "sigmoid") -> np.ndarray
     Returns:
         淡入淡出曲线数组
     """
-    t = np.linspace(0, 1, n_samples)
+    # 与音频同为 float32，与之相乘时不会提升为 float64
+    t = np.linspace(0, 1, n_samples, dtype=np.float32)
 
     if curve_type == "linear":
         return t
@@ -159,6 +184,37 @@ def smooth_fade_curve(n_samples: int, curve_type: str = "sigmoid") -> np.ndarray
         return t
 
 
+def smooth_fade_curve_pair(
+    n_samples: int, curve_type: str = "sigmoid"
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    生成一对淡入 / 淡出曲线，淡出曲线为淡入曲线的时间反转
+
+    equal_power 的淡出曲线 cos 与淡入曲线 sin 取同一组相位直接计算，其余曲线反转淡入曲线
+
+    Returns:
+        (淡入曲线, 淡出曲线)
+    """
+    if curve_type == "equal_power":
+        x = np.linspace(0, 1, n_samples, dtype=np.float32) * (np.pi / 2)
+        return np.sin(x), np.cos(x)
+
+    fade_in = smooth_fade_curve(n_samples, curve_type)
+    return fade_in, np.ascontiguousarray(fade_in[::-1])
+
+
+@lru_cache(maxsize=16)
+def cached_fade_curves(n_samples: int, curve_type: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    smooth_fade_curve_pair 的缓存版本（只读数组）
+    过渡时长只有几档，同一采样率下曲线反复相同，不必每次混音重新计算
+    """
+    curves = smooth_fade_curve_pair(n_samples, curve_type)
+    for curve in curves:
+        curve.flags.writeable = False
+    return curves
+
+
 class CrossfadeStrategy(TransitionStrategy):
     """Crossfade 淡入淡出策略"""
 
@@ -192,14 +248,18 @@ class CrossfadeStrategy(TransitionStrategy):
         audio_b: np.ndarray,
         sr: int,
         transition_point: int,
-        beats_a: list[float] | None = None,
-        beats_b: list[float] | None = None,
+        beats_a: list[float] | np.ndarray | None = None,
+        beats_b: list[float] | np.ndarray | None = None,
         transition_point_b: float = 0,
     ) -> np.ndarray:
         fade_samples = int(self._fade_duration * sr)
 
         # 歌曲B开始位置（跳过前奏）
         start_b = int(transition_point_b * sr) if transition_point_b > 0 else 0
+
+        # 跳过歌曲B开始位置的静音，避免淡入一段静音
+        if self._skip_silence:
+            start_b = skip_leading_silence(audio_b, sr, start_b, 2 * fade_samples)
         if start_b >= len(audio_b):
             start_b = 0
 
@@ -209,38 +269,57 @@ class CrossfadeStrategy(TransitionStrategy):
             transition_point = fade_samples
 
         # 节拍对齐
-        if self._align_to_beat and beats_a:
+        if self._align_to_beat and beats_a is not None and len(beats_a) > 0:
             transition_point = find_nearest_beat(transition_point, beats_a, sr)
             if transition_point < fade_samples:
                 transition_point = fade_samples * 2
 
         fade_samples = min(fade_samples, transition_point)
 
-        fade_out_curve = smooth_fade_curve(fade_samples, self._curve_type)
-        fade_in_curve = smooth_fade_curve(fade_samples, self._curve_type)
+        fade_in_curve, fade_out_curve = cached_fade_curves(fade_samples, self._curve_type)
 
         # 歌曲A完整长度 + 歌曲B从start_b开始的部分
         b_tail = max(0, len(audio_b) - start_b - fade_samples)
         result_len = len(audio_a) + b_tail
-        result = np.zeros(result_len)
+        result = np.zeros(result_len, dtype=np.result_type(audio_a, audio_b))
 
-        # 1. 歌曲A完整复制到结果（从0到transition_point）
-        result[:transition_point] = audio_a[:transition_point]
-
-        # 2. 歌曲A过渡区淡出（从transition_point-fade_samples到transition_point）
+        # 1. 歌曲A过渡区之前的部分直接复制到结果
         fade_start = transition_point - fade_samples
-        for i in range(fade_samples):
-            if fade_start + i < len(audio_a):
-                result[fade_start + i] *= fade_out_curve[i]
-
-        # 3. 歌曲B淡入叠加到过渡区
-        b_fade_data = audio_b[start_b : start_b + fade_samples].copy()
-        b_fade_data *= fade_in_curve
-
-        # 叠加到过渡区
-        overlap_end = min(fade_start + fade_samples, result_len)
-        b_len = overlap_end - fade_start
-        result[fade_start:overlap_end] += b_fade_data[:b_len]
+        result[:fade_start] = audio_a[:fade_start]
+
+        a_fade_len = min(fade_samples, len(audio_a) - fade_start)
+        b_fade_src = audio_b[start_b : start_b + fade_samples]
+        if (
+            a_fade_len == fade_samples
+            and len(b_fade_src) == fade_samples
+            and audio_a.dtype == result.dtype
+        ):
+            # 2+3. 两首歌都有完整的过渡区（常见情况）：淡出、淡入和叠加一遍完成
+            crossfade_mix(
+                result[fade_start:transition_point],
+                audio_a[fade_start:transition_point],
+                fade_out_curve,
+                b_fade_src,
+                fade_in_curve,
+            )
+        else:
+            # 2. 歌曲A过渡区淡出（从transition_point-fade_samples到transition_point），
+            #    相乘结果直接写入结果数组
+            np.multiply(
+                audio_a[fade_start : fade_start + a_fade_len],
+                fade_out_curve[:a_fade_len],
+                out=result[fade_start : fade_start + a_fade_len],
+                dtype=result.dtype,
+            )
+
+            # 3. 歌曲B淡入叠加到过渡区
+            with buffer_pool.borrow(len(b_fade_src), audio_b.dtype) as b_fade_data:
+                np.multiply(b_fade_src, fade_in_curve[: len(b_fade_src)], out=b_fade_data)
+
+                # 叠加到过渡区
+                overlap_end = min(fade_start + fade_samples, result_len)
+                b_len = overlap_end - fade_start
+                result[fade_start:overlap_end] += b_fade_data[:b_len]
 
         # 4. 歌曲B剩余部分
         if start_b + fade_samples < len(audio_b):
@@ -266,6 +345,14 @@ class BeatSyncStrategy(TransitionStrategy):
         self._curve_type = curve_type
         self._align_to_beat = align_to_beat
 
+        # 参数在构造后不变，过渡时复用同一个 Crossfade 实例
+        self._crossfade = CrossfadeStrategy(
+            fade_duration=fade_duration,
+            curve_type=curve_type,
+            align_to_beat=align_to_beat,
+            skip_silence=True,
+        )
+
     @property
     def name(self) -> str:
         return "beat_sync"
@@ -284,18 +371,12 @@ class BeatSyncStrategy(TransitionStrategy):
         audio_b: np.ndarray,
         sr: int,
         transition_point: int,
-        beats_a: list[float] | None = None,
-        beats_b: list[float] | None = None,
+        beats_a: list[float] | np.ndarray | None = None,
+        beats_b: list[float] | np.ndarray | None = None,
         transition_point_b: float = 0,
     ) -> np.ndarray:
         # 使用优化的 Crossfade（带节拍对齐）
-        crossfade = CrossfadeStrategy(
-            fade_duration=self._fade_duration,
-            curve_type=self._curve_type,
-            align_to_beat=self._align_to_beat,
-            skip_silence=True,
-        )
-        return crossfade.apply(
+        return self._crossfade.apply(
             audio_a, audio_b, sr, transition_point, beats_a, beats_b, transition_point_b
         )
 
@@ -309,22 +390,35 @@ class TransitionFactory:
         "beat_sync": BeatSyncStrategy,
     }
 
+    # 额外策略所在的模块，导入时通过 register 注册，首次使用工厂时导入一次
+    _extra_modules = (
+        "mixer_core.transition.echo_fade",
+        "mixer_core.transition.harmonic",
+    )
+    _extras_loaded = False
+
     @classmethod
-    def _init_strategies(cls):
-        """动态加载额外策略"""
-        try:
-            from mixer_core.transition.echo_fade import EchoFadeStrategy
+    def register(cls, name: str):
+        """注册策略类的装饰器，如 @TransitionFactory.register("echo_fade")"""
 
-            cls._strategies["echo_fade"] = EchoFadeStrategy
-        except ImportError:
-            pass
+        def decorator(strategy_class):
+            cls._strategies[name] = strategy_class
+            return strategy_class
 
-        try:
-            from mixer_core.transition.harmonic import HarmonicMixStrategy
+        return decorator
 
-            cls._strategies["harmonic"] = HarmonicMixStrategy
-        except ImportError:
-            pass
+    @classmethod
+    def _init_strategies(cls):
+        """动态加载额外策略（只加载一次，缺少依赖的策略跳过）"""
+        if cls._extras_loaded:
+            return
+        cls._extras_loaded = True
+
+        for module in cls._extra_modules:
+            try:
+                importlib.import_module(module)
+            except ImportError:
+                pass
 
     @classmethod
     def create(cls, strategy_name: str, **kwargs) -> TransitionStrategy:
@@ -4,9 +4,11 @@ Echo fade 过渡策略
 
 import numpy as np
 
-from mixer_core.transition.base import CrossfadeStrategy
+from mixer_core.fastmath import add_delayed
+from mixer_core.transition.base import CrossfadeStrategy, TransitionFactory
 
 
+@TransitionFactory.register("echo_fade")
 class EchoFadeStrategy(CrossfadeStrategy):
     """Echo fade 回声过渡策略"""
 
@@ -78,6 +80,7 @@ class EchoFadeStrategy(CrossfadeStrategy):
             dst_end = dst_start + (src_end - src_start)
 
             if dst_end <= len(result) and src_end > src_start:
-                result[dst_start:dst_end] += result[src_start:src_end] * echo_gain
+                # 原地叠加，不生成 result[src_start:src_end] * echo_gain 临时数组
+                add_delayed(result, src_start, src_end, echo_offset, result.dtype.type(echo_gain))
 
         return result
@@ -7,40 +7,20 @@ import logging
 
 import librosa
 import numpy as np
-
-from mixer_core.transition.base import CrossfadeStrategy
+import soundfile as sf
+import soxr
+
+from mixer_core.compatibility import (
+    CIRCLE_OF_FIFTHS,
+    KEY_NAMES,
+    KEY_PATTERNS,
+    key_position,
+)
+from mixer_core.config import ANALYSIS_SR
+from mixer_core.transition.base import CrossfadeStrategy, TransitionFactory
 
 logger = logging.getLogger(__name__)
 
-# 五度圈映射
-# C -> G -> D -> A -> E -> B -> F# -> Db -> Ab -> Eb -> Bb -> F -> C
-CIRCLE_OF_FIFTHS = {
-    "C": 0,
-    "G": 1,
-    "D": 2,
-    "A": 3,
-    "E": 4,
-    "B": 5,
-    "F#": 6,
-    "Db": 7,
-    "Ab": 8,
-    "Eb": 9,
-    "Bb": 10,
-    "F": 11,
-    "Am": 0,
-    "Em": 1,
-    "Bm": 2,
-    "F#m": 3,
-    "C#m": 4,
-    "G#m": 5,
-    "Ebm": 6,
-    "Bbm": 7,
-    "Fm": 8,
-    "Cm": 9,
-    "Gm": 10,
-    "Dm": 11,
-}
-
 # 和谐调性对（距离 0-2 或 10-11）
 HARMONIC_COMPATIBLE = {
     0: [0, 1, 2, 7, 8, 9, 10, 11],  # C 大调
@@ -49,90 +29,37 @@ HARMONIC_COMPATIBLE = {
     # ... 更多
 }
 
+# 调性检测逐块读取音频，每块约 30 秒（为色度帧移 512 的整数倍，块之间帧不错位）
+KEY_BLOCK_SECONDS = 30
+CHROMA_HOP_LENGTH = 512
 
-def detect_key(audio_path: str, sr: int = 16000) -> tuple[str, int]:
+# MP3 每帧 1152（或 576）个样本；libsndfile 按非帧长整数倍读取 MP3 时块边界处的样本会出错，
+# 读取块长须取其整数倍
+MP3_FRAME_LENGTH = 1152
+
+
+def detect_key(audio_path: str, sr: int = ANALYSIS_SR) -> tuple[str, int]:
     """
     检测歌曲调性
 
     Returns:
         (key_name, key_number): 如 ("C", 0) 或 ("Am", 0)
     """
-    y, sr = librosa.load(audio_path, sr=sr)
-
-    # 使用色度特征检测调性
-    chroma = librosa.feature.chroma_cqt(y=y, sr=sr)
+    # 逐块计算色度并累加帧数，不把整首歌解码进内存
+    chroma_sum = np.zeros(12)
+    n_frames = 0
+    for y in _iter_blocks(audio_path, sr):
+        chroma = librosa.feature.chroma_cqt(y=y, sr=sr, hop_length=CHROMA_HOP_LENGTH)
+        chroma_sum += chroma.sum(axis=1)
+        n_frames += chroma.shape[1]
 
     # 平均色度
-    chroma_mean = np.mean(chroma, axis=1)
-
-    # 简化的调性检测
-    # C 大调: C, D, E, F, G, A, B
-    # 对应 chroma 索引: 0, 2, 4, 5, 7, 9, 11
-    major_pattern = np.array([1, 0, 1, 0, 1, 1, 0, 1, 0, 1, 0, 1])  # C major
-    minor_pattern = np.array([1, 0, 1, 1, 0, 1, 0, 1, 0, 1, 0, 0])  # A minor
-
-    # 尝试每个调
-    best_key = "C"
-    best_score = 0
-
-    keys = [
-        "C",
-        "G",
-        "D",
-        "A",
-        "E",
-        "B",
-        "F#",
-        "Db",
-        "Ab",
-        "Eb",
-        "Bb",
-        "F",
-        "Am",
-        "Em",
-        "Bm",
-        "F#m",
-        "C#m",
-        "G#m",
-        "Ebm",
-        "Bbm",
-        "Fm",
-        "Cm",
-        "Gm",
-        "Dm",
-    ]
-
-    for key in keys:
-        is_minor = "m" in key
-        root = key.replace("m", "")
-        if root not in [
-            "C",
-            "C#",
-            "Db",
-            "D",
-            "D#",
-            "Eb",
-            "E",
-            "F",
-            "F#",
-            "Gb",
-            "G",
-            "G#",
-            "Ab",
-            "A",
-            "A#",
-            "Bb",
-            "B",
-        ]:
-            continue
-
-        # 旋转模式
-        pattern = minor_pattern if is_minor else major_pattern
-        score = np.dot(chroma_mean, pattern)
-
-        if score > best_score:
-            best_score = score
-            best_key = key
+    chroma_mean = chroma_sum / max(n_frames, 1)
+
+    # 简化的调性检测：与大调 / 小调音阶模板做点积，一次矩阵乘法算出全部 24 个调性的得分
+    # （模板与 compatibility 共用，argmax 取第一个最高分，与逐个比较一致）
+    scores = KEY_PATTERNS @ chroma_mean
+    best_key = KEY_NAMES[int(scores.argmax())]
 
     key_number = CIRCLE_OF_FIFTHS.get(best_key, 0)
 
@@ -141,6 +68,39 @@ def detect_key(audio_path: str, sr: int = 16000) -> tuple[str, int]:
     return best_key, key_number
 
 
+def _iter_blocks(audio_path: str, sr: int):
+    """
+    逐块读取音频，转为单声道并流式重采样到 sr（与 librosa.load 同为 soxr HQ），
+    每块 KEY_BLOCK_SECONDS 秒，最后一块可能较短；soundfile 不支持的格式整首加载
+    """
+    block_len = sr * KEY_BLOCK_SECONDS // CHROMA_HOP_LENGTH * CHROMA_HOP_LENGTH
+
+    try:
+        f = sf.SoundFile(audio_path)
+    except sf.LibsndfileError:
+        y, _ = librosa.load(audio_path, sr=sr)
+        for start in range(0, len(y), block_len):
+            yield y[start : start + block_len]
+        return
+
+    with f:
+        resampler = soxr.ResampleStream(f.samplerate, sr, 1, dtype="float32", quality="HQ")
+        pending = np.empty(0, dtype=np.float32)
+        read_len = f.samplerate * KEY_BLOCK_SECONDS // MP3_FRAME_LENGTH * MP3_FRAME_LENGTH
+        for data in f.blocks(blocksize=read_len, dtype="float32"):
+            mono = data.mean(axis=1) if data.ndim > 1 else data
+            pending = np.concatenate([pending, resampler.resample_chunk(mono)])
+            while len(pending) >= block_len:
+                yield pending[:block_len]
+                pending = pending[block_len:]
+
+        pending = np.concatenate(
+            [pending, resampler.resample_chunk(np.empty(0, np.float32), last=True)]
+        )
+        if len(pending):
+            yield pending
+
+
 def calculate_harmonic_distance(key1: int, key2: int) -> int:
     """计算两个调性在五度圈上的距离"""
     distance = abs(key1 - key2)
@@ -154,6 +114,7 @@ def is_harmonic_compatible(key1: int, key2: int) -> bool:
     return distance <= 2 or distance >= 10
 
 
+@TransitionFactory.register("harmonic")
 class HarmonicMixStrategy(CrossfadeStrategy):
     """Harmonic Mix 调性匹配策略"""
 
@@ -168,6 +129,19 @@ class HarmonicMixStrategy(CrossfadeStrategy):
         super().__init__(fade_duration, curve_type, align_to_beat, skip_silence)
         self._prefer_harmonic = prefer_harmonic
 
+        # 调性和谐时深度重叠（1.5 倍时长），不和谐时缩短过渡（0.5 倍时长），
+        # 两种过渡的参数在构造后不变，预先建好复用
+        self._harmonic_crossfade = self._scaled_crossfade(1.5)
+        self._clash_crossfade = self._scaled_crossfade(0.5)
+
+    def _scaled_crossfade(self, ratio: float) -> CrossfadeStrategy:
+        return CrossfadeStrategy(
+            fade_duration=self._fade_duration * ratio,
+            curve_type=self._curve_type,
+            align_to_beat=self._align_to_beat,
+            skip_silence=self._skip_silence,
+        )
+
     @property
     def name(self) -> str:
         return "harmonic"
@@ -204,23 +178,16 @@ class HarmonicMixStrategy(CrossfadeStrategy):
                 transition_point_b=transition_point_b,
             )
 
-        key_a_num = CIRCLE_OF_FIFTHS.get(key_a.replace("#", "").replace("b", ""), 0)
-        key_b_num = CIRCLE_OF_FIFTHS.get(key_b.replace("#", "").replace("b", ""), 0)
+        key_a_num = key_position(key_a)
+        key_b_num = key_position(key_b)
         distance = calculate_harmonic_distance(key_a_num, key_b_num)
 
         if is_harmonic_compatible(key_a_num, key_b_num):
             logger.info(f"调性和谐 (距离: {distance})，使用深度重叠")
-            adjusted_duration = self._fade_duration * 1.5
+            adjusted_strategy = self._harmonic_crossfade
         else:
             logger.info(f"调性不和谐 (距离: {distance})，缩短过渡")
-            adjusted_duration = self._fade_duration * 0.5
-
-        adjusted_strategy = CrossfadeStrategy(
-            fade_duration=adjusted_duration,
-            curve_type=self._curve_type,
-            align_to_beat=self._align_to_beat,
-            skip_silence=self._skip_silence,
-        )
+            adjusted_strategy = self._clash_crossfade
 
         return adjusted_strategy.apply(
             audio_a,
@@ -0,0 +1,3 @@
+"""
+music-mix Web 服务公共模块
+"""
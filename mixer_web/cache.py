@@ -0,0 +1,85 @@
+"""
+结果缓存
+以上传内容的哈希为键缓存兼容性评估和混音结果，重复上传同一对歌曲时跳过计算
+"""
+
+import json
+import os
+import uuid
+
+from blake3 import blake3
+
+from mixer_core.cache import JSONCache, atomic_write_json, cache_path
+from mixer_web.config import OUTPUT_MAX_AGE, OUTPUT_MAX_BYTES
+from mixer_web.outputs import prune_outputs
+from mixer_web.workers import evaluate_job, mix_job, run_job
+
+_eval_cache = JSONCache(cache_path("eval"), maxsize=1024)
+
+
+def cached_evaluate(buf_a: bytes, buf_b: bytes, digest_a: str, digest_b: str) -> dict:
+    """
+    评估两首歌曲的兼容性，命中缓存时直接返回
+
+    结果包含 bpm_a/key_a 等有方向的字段，因此缓存键区分 A/B 顺序
+    """
+    key = f"{digest_a}_{digest_b}"
+    result = _eval_cache.get(key)
+    if result is None:
+        result = run_job(evaluate_job, buf_a, buf_b, digest_a, digest_b)
+        _eval_cache.put(key, result)
+    return result
+
+
+def cached_mix(
+    track_a_path: str,
+    track_b_path: str,
+    strategy: str,
+    output_folder: str,
+    digest_a: str,
+    digest_b: str,
+) -> tuple[dict, str]:
+    """
+    混音两首歌曲，输出文件以 (A, B, 策略) 的哈希命名，相同请求直接复用已有结果
+
+    输出文件旁保存 .meta（混音结果 JSON），命中时从中恢复响应字段；
+    生成新结果后按 OUTPUT_MAX_BYTES / OUTPUT_MAX_AGE 清理最久未使用的结果
+
+    Returns:
+        (result, output_filename)
+    """
+    mix_key = blake3(f"{digest_a}:{digest_b}:{strategy}".encode()).hexdigest()
+    output_filename = f"{mix_key}.mp3"
+    output_path = os.path.join(output_folder, output_filename)
+    meta_path = f"{output_path}.meta"
+
+    if os.path.exists(output_path):
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            pass
+        else:
+            # 更新 .meta 的修改时间作为最近使用时间（不改 .mp3，下载的 ETag 保持不变）
+            try:
+                os.utime(meta_path)
+            except OSError:
+                pass
+            return result, output_filename
+
+    # 先写临时文件再重命名，并发的相同请求不会读到写了一半的 MP3
+    tmp_path = os.path.join(output_folder, f".{uuid.uuid4()}.mp3")
+    try:
+        result = run_job(
+            mix_job, track_a_path, track_b_path, strategy, tmp_path, digest_a, digest_b
+        )
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    result["output"] = output_path
+    atomic_write_json(meta_path, result)
+
+    prune_outputs(output_folder, OUTPUT_MAX_BYTES, OUTPUT_MAX_AGE, keep=output_filename)
+    return result, output_filename
@@ -0,0 +1,45 @@
+"""
+Web 服务配置
+"""
+
+import os
+
+# 内存文件系统（tmpfs）：上传文件写入页缓存，不占用磁盘带宽
+SHM_DIR = "/dev/shm"
+
+# /dev/shm 可用空间低于该值时回退到 /tmp（Docker 默认 shm 只有 64MB）
+MIN_SHM_FREE = 256 * 1024 * 1024
+
+
+def scratch_dir(name: str) -> str:
+    """
+    返回临时文件目录路径：优先使用 /dev/shm，不可用或空间不足时使用 /tmp
+
+    Args:
+        name: 子目录名，如 "music-mix-uploads"
+    """
+    base = "/tmp"
+    if os.path.isdir(SHM_DIR) and os.access(SHM_DIR, os.W_OK):
+        stat = os.statvfs(SHM_DIR)
+        if stat.f_bavail * stat.f_frsize >= MIN_SHM_FREE:
+            base = SHM_DIR
+    return os.path.join(base, name)
+
+
+# 分析/混音进程数：每个进程常驻 librosa 及音频数据，限制数量以控制内存
+MIX_WORKERS = int(os.environ.get("MIX_WORKERS") or min(4, os.cpu_count() or 1))
+
+# 单个任务的最长等待时间（秒）
+JOB_TIMEOUT = float(os.environ.get("MIX_JOB_TIMEOUT", "120"))
+
+# 上传目录：上传文件在请求结束后即删除，默认使用 /dev/shm (tmpfs)，不可用时回退到 /tmp；
+# 输出目录：混音结果作为缓存长期保留，放在磁盘上（/tmp），不占用内存。均可通过环境变量覆盖
+UPLOAD_FOLDER = os.environ.get("UPLOAD_FOLDER") or scratch_dir("music-mix-uploads")
+OUTPUT_FOLDER = os.environ.get("OUTPUT_FOLDER") or os.path.join("/tmp", "music-mix-outputs")
+
+# 输出目录中混音结果的保留上限：总大小（MB）和最长未使用时间（秒），超出时删除最久未使用的结果
+OUTPUT_MAX_BYTES = int(os.environ.get("OUTPUT_MAX_MB", "1024")) * 1024 * 1024
+OUTPUT_MAX_AGE = float(os.environ.get("OUTPUT_MAX_AGE", str(24 * 3600)))
+
+# 单个请求的最大上传大小
+MAX_CONTENT_LENGTH = int(os.environ.get("MAX_CONTENT_LENGTH", str(50 * 1024 * 1024)))
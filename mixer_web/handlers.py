@@ -0,0 +1,174 @@
+"""
+Web 接口处理模块
+/api/mix、/api/evaluate、/api/output 的实现，供各个 Flask 应用和 Vercel 入口共用
+"""
+
+import logging
+import os
+
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from mixer_web.cache import cached_evaluate, cached_mix
+from mixer_web.config import MAX_CONTENT_LENGTH, OUTPUT_FOLDER, UPLOAD_FOLDER
+from mixer_web.outputs import send_output
+from mixer_web.uploads import read_uploads, remove_uploads, stream_uploads
+from mixer_web.workers import prewarm
+
+logger = logging.getLogger(__name__)
+
+# 策略名称（前端展示用）
+STRATEGY_NAMES = {
+    "beat_sync": "Beat-sync",
+    "crossfade": "Crossfade",
+    "echo_fade": "Echo",
+    "harmonic": "Harmonic",
+}
+
+
+def mix_handler(request, upload_folder: str, output_folder: str) -> tuple[dict, int]:
+    """混音接口，返回 (响应数据, 状态码)"""
+    try:
+        # 流式保存上传文件
+        files, form, digests = stream_uploads(request, upload_folder)
+        try:
+            if "track_a" not in files or "track_b" not in files:
+                return {"error": "缺少音频文件"}, 400
+
+            strategy = form.get("strategy", "crossfade")
+
+            # 混音（相同歌曲和策略的结果直接复用）
+            result, output_filename = cached_mix(
+                files["track_a"],
+                files["track_b"],
+                strategy,
+                output_folder,
+                digests["track_a"],
+                digests["track_b"],
+            )
+        finally:
+            # 清理临时文件（混音失败或超时也要删除，上传目录可能在内存中）
+            remove_uploads(files.values())
+
+        return {
+            "success": True,
+            "strategy": result["strategy"],
+            "bpm_a": result["bpm_a"],
+            "bpm_b": result["bpm_b"],
+            "duration": result["duration"],
+            "transition_point": result["transition_point"],
+            "transition_point_b": result.get("transition_point_b", 0),
+            "transition_duration": result.get("transition_duration", 10),
+            "output_url": f"/api/output/{output_filename}",
+            "compatibility": result.get("compatibility", {}),
+        }, 200
+
+    except RequestEntityTooLarge:
+        return _too_large(request)
+    except Exception as e:
+        logger.exception("混音错误")
+        return {"error": str(e)}, 500
+
+
+def evaluate_handler(request, max_file_size: int | None = None) -> tuple[dict, int]:
+    """
+    兼容性评估接口，返回 (响应数据, 状态码)
+
+    Args:
+        request: 请求对象
+        max_file_size: 单个文件的大小上限（字节），为空时不限制
+    """
+    try:
+        # 上传数据直接在内存中分析，不写临时文件
+        files, _, digests = read_uploads(request)
+        if "track_a" not in files or "track_b" not in files:
+            return {"error": "缺少音频文件"}, 400
+
+        buf_a = files["track_a"]
+        buf_b = files["track_b"]
+        if max_file_size and max(len(buf_a), len(buf_b)) > max_file_size:
+            limit_mb = max_file_size // (1024 * 1024)
+            return {"error": f"文件太大，请使用小于 {limit_mb}MB 的音频文件"}, 400
+
+        # 评估兼容性
+        result = cached_evaluate(buf_a, buf_b, digests["track_a"], digests["track_b"])
+
+        return {
+            "success": True,
+            "score": result["score"],
+            "bpm_score": result.get("bpm_score"),
+            "key_score": result.get("key_score"),
+            "beat_score": result.get("beat_score"),
+            "bpm_a": result["bpm_a"],
+            "bpm_b": result["bpm_b"],
+            "recommendation": result["recommendation"],
+            "recommendation_name": STRATEGY_NAMES.get(
+                result["recommendation"], result["recommendation"]
+            ),
+            "reason": result["reason"],
+        }, 200
+
+    except RequestEntityTooLarge:
+        return _too_large(request)
+    except Exception as e:
+        logger.exception("评估错误")
+        return {"error": str(e)}, 500
+
+
+def _too_large(request) -> tuple[dict, int]:
+    limit = getattr(request, "max_content_length", None) or MAX_CONTENT_LENGTH
+    return {"error": f"文件太大，上传总大小不能超过 {limit // (1024 * 1024)}MB"}, 413
+
+
+def output_handler(request, output_folder: str, filename: str):
+    """获取混音结果，返回文件响应或 (错误数据, 404)"""
+    response = send_output(output_folder, filename, request.environ)
+    if response is None:
+        return {"error": "文件未找到"}, 404
+    return response
+
+
+def register_routes(app) -> None:
+    """
+    在 Flask 应用上注册 /api/mix、/api/evaluate、/api/output、/health，
+    并在后台预热 Mixer
+
+    app.config 中未设置的 UPLOAD_FOLDER、OUTPUT_FOLDER、MAX_CONTENT_LENGTH 使用
+    mixer_web.config 的默认值；可选的 MAX_EVALUATE_FILE_SIZE 限制评估时的单个文件大小
+    """
+    from flask import jsonify, request
+
+    app.config.setdefault("UPLOAD_FOLDER", UPLOAD_FOLDER)
+    app.config.setdefault("OUTPUT_FOLDER", OUTPUT_FOLDER)
+    if app.config.get("MAX_CONTENT_LENGTH") is None:
+        app.config["MAX_CONTENT_LENGTH"] = MAX_CONTENT_LENGTH
+
+    os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+    os.makedirs(app.config["OUTPUT_FOLDER"], exist_ok=True)
+
+    def mix():
+        body, status = mix_handler(
+            request, app.config["UPLOAD_FOLDER"], app.config["OUTPUT_FOLDER"]
+        )
+        return jsonify(body), status
+
+    def evaluate():
+        body, status = evaluate_handler(request, app.config.get("MAX_EVALUATE_FILE_SIZE"))
+        return jsonify(body), status
+
+    def get_output(filename):
+        response = output_handler(request, app.config["OUTPUT_FOLDER"], filename)
+        if isinstance(response, tuple):
+            body, status = response
+            return jsonify(body), status
+        return response
+
+    def health():
+        return jsonify({"status": "ok"})
+
+    app.add_url_rule("/api/mix", "mix", mix, methods=["POST"])
+    app.add_url_rule("/api/evaluate", "evaluate", evaluate, methods=["POST"])
+    app.add_url_rule("/api/output/<filename>", "get_output", get_output)
+    app.add_url_rule("/health", "health", health)
+
+    # 后台预热 Mixer 和进程池，首个请求无需等待 librosa 导入和 numba 编译
+    prewarm()
@@ -0,0 +1,77 @@
+"""
+混音结果下载和清理
+"""
+
+import os
+import time
+
+from werkzeug.exceptions import NotFound
+from werkzeug.utils import send_from_directory
+
+# 输出文件按输入内容哈希命名，内容不会变化，允许客户端缓存
+OUTPUT_HTTP_MAX_AGE = 3600
+
+
+def send_output(output_folder: str, filename: str, environ: dict):
+    """
+    返回输出 MP3 的响应：支持 Range/条件请求，文件对象交给 WSGI 服务器发送（可走 sendfile）
+
+    Args:
+        output_folder: 输出目录
+        filename: 文件名（不允许跳出 output_folder）
+        environ: WSGI environ，即 request.environ
+
+    Returns:
+        Response，文件不存在时返回 None
+    """
+    try:
+        return send_from_directory(
+            output_folder,
+            filename,
+            environ,
+            mimetype="audio/mpeg",
+            conditional=True,
+            max_age=OUTPUT_HTTP_MAX_AGE,
+        )
+    except NotFound:
+        return None
+
+
+def prune_outputs(
+    output_folder: str, max_bytes: int, max_age: float, keep: str | None = None
+) -> None:
+    """
+    清理输出目录：删除超过 max_age 秒未使用的混音结果，总大小仍超过 max_bytes 时
+    再按最近使用时间从旧到新删除
+
+    每个结果的 .mp3 和 .meta 一起删除；最近使用时间取两者中较新的修改时间
+    （命中缓存时更新 .meta 的修改时间）。以 "." 开头的是正在写入的临时文件，不处理；
+    keep 为刚生成、即将返回给客户端的结果文件名，不删除
+    """
+    outputs = {}
+    try:
+        with os.scandir(output_folder) as it:
+            for entry in it:
+                if entry.name.startswith(".") or not entry.is_file():
+                    continue
+                base = entry.name.removesuffix(".meta")
+                st = entry.stat()
+                mtime, size = outputs.get(base, (0.0, 0))
+                outputs[base] = (max(mtime, st.st_mtime), size + st.st_size)
+    except OSError:
+        return
+
+    total = sum(size for _, size in outputs.values())
+    expire_before = time.time() - max_age
+    for base, (mtime, size) in sorted(outputs.items(), key=lambda item: item[1][0]):
+        if mtime >= expire_before and total <= max_bytes:
+            break
+        if base == keep:
+            continue
+        path = os.path.join(output_folder, base)
+        for name in (path, f"{path}.meta"):
+            try:
+                os.remove(name)
+            except OSError:
+                pass
+        total -= size
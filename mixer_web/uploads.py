@@ -0,0 +1,217 @@
+"""
+上传处理模块
+使用 streaming-form-data 将 multipart 请求体直接流式写入目标文件
+"""
+
+import os
+import queue
+import threading
+import uuid
+
+from blake3 import blake3
+from streaming_form_data import StreamingFormDataParser
+from streaming_form_data.targets import FileTarget, ValueTarget
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from mixer_web.config import MAX_CONTENT_LENGTH
+
+# 每次从请求流读取的字节数
+CHUNK_SIZE = 64 * 1024
+
+# 读取线程最多预读的块数
+PREFETCH_CHUNKS = 8
+
+
+def stream_uploads(
+    request,
+    upload_folder: str,
+    file_fields: tuple[str, ...] = ("track_a", "track_b"),
+    value_fields: tuple[str, ...] = ("strategy",),
+) -> tuple[dict[str, str], dict[str, str], dict[str, str]]:
+    """
+    流式解析上传请求，文件字段直接写入 upload_folder，不经过 werkzeug 的临时文件
+
+    Args:
+        request: Flask/werkzeug 请求对象（需提供 headers 和 stream）
+        upload_folder: 上传文件保存目录
+        file_fields: 文件字段名
+        value_fields: 普通表单字段名
+
+    Returns:
+        (files, form, digests): files 为 {字段名: 文件路径}，只包含实际上传的字段；
+        form 为 {字段名: 字符串值}；digests 为 {字段名: 内容哈希}
+
+    Raises:
+        RequestEntityTooLarge: 请求体超过上限（已写入的文件会被删除）
+    """
+    parser = StreamingFormDataParser(headers=request.headers)
+
+    # 解析前确定最终路径，FileTarget 直接写入，无需二次保存
+    file_targets = {}
+    for name in file_fields:
+        path = os.path.join(upload_folder, f"{uuid.uuid4()}_{name}")
+        file_targets[name] = HashingFileTarget(path)
+        parser.register(name, file_targets[name])
+
+    value_targets = _register_values(parser, value_fields)
+    try:
+        _feed(parser, request)
+    except BaseException:
+        remove_uploads(t.filename for t in file_targets.values() if os.path.exists(t.filename))
+        raise
+
+    # FileTarget 在对应字段出现时才创建文件
+    files = {}
+    digests = {}
+    for name, target in file_targets.items():
+        if os.path.exists(target.filename):
+            files[name] = target.filename
+            digests[name] = target.hexdigest
+    return files, _form_values(value_targets), digests
+
+
+def read_uploads(
+    request,
+    file_fields: tuple[str, ...] = ("track_a", "track_b"),
+    value_fields: tuple[str, ...] = ("strategy",),
+) -> tuple[dict[str, bytes], dict[str, str], dict[str, str]]:
+    """
+    流式解析上传请求，文件字段保留在内存中（用于无需落盘的只读分析）
+
+    Returns:
+        (files, form, digests): files 为 {字段名: 文件数据}，只包含非空的字段；
+        form 为 {字段名: 字符串值}；digests 为 {字段名: 内容哈希}，
+        哈希在接收数据时同步计算，不额外遍历数据
+
+    Raises:
+        RequestEntityTooLarge: 请求体超过上限
+    """
+    parser = StreamingFormDataParser(headers=request.headers)
+
+    file_targets = {}
+    for name in file_fields:
+        file_targets[name] = HashingValueTarget()
+        parser.register(name, file_targets[name])
+
+    value_targets = _register_values(parser, value_fields)
+    _feed(parser, request)
+
+    files = {}
+    digests = {}
+    for name, target in file_targets.items():
+        data = target.value
+        if data:
+            files[name] = data
+            digests[name] = target.hexdigest
+    return files, _form_values(value_targets), digests
+
+
+class _HashingMixin:
+    """在 on_data_received 中顺带计算 BLAKE3 哈希，数据只遍历一次"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._hasher = blake3()
+
+    def on_data_received(self, chunk: bytes):
+        self._hasher.update(chunk)
+        super().on_data_received(chunk)
+
+    @property
+    def hexdigest(self) -> str:
+        return self._hasher.hexdigest()
+
+
+class HashingValueTarget(_HashingMixin, ValueTarget):
+    """在内存中收集数据，同时计算内容哈希"""
+
+
+class HashingFileTarget(_HashingMixin, FileTarget):
+    """写入文件，同时计算内容哈希"""
+
+
+def _register_values(parser: StreamingFormDataParser, value_fields) -> dict[str, ValueTarget]:
+    """注册普通表单字段"""
+    value_targets = {}
+    for name in value_fields:
+        value_targets[name] = ValueTarget()
+        parser.register(name, value_targets[name])
+    return value_targets
+
+
+def _feed(parser: StreamingFormDataParser, request) -> None:
+    """
+    把请求流分块送入解析器
+
+    由后台线程读取网络数据，当前线程同时解析、写盘和计算哈希，
+    两边都在 I/O 或哈希时释放 GIL，接收与写入可以重叠进行。
+    累计字节数超过上限时立即抛出 RequestEntityTooLarge，不再读取剩余数据
+    """
+    limit = getattr(request, "max_content_length", None) or MAX_CONTENT_LENGTH
+    if request.content_length is not None and request.content_length > limit:
+        raise RequestEntityTooLarge()
+
+    stream = request.stream
+    chunks = queue.Queue(maxsize=PREFETCH_CHUNKS)
+    done = threading.Event()
+
+    def read():
+        try:
+            while not done.is_set():
+                chunk = stream.read(CHUNK_SIZE)
+                chunks.put(chunk)
+                if not chunk:
+                    break
+        except Exception as e:
+            chunks.put(e)
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    received = 0
+    try:
+        while chunk := chunks.get():
+            if isinstance(chunk, Exception):
+                raise chunk
+            received += len(chunk)
+            if received > limit:
+                raise RequestEntityTooLarge()
+            parser.data_received(chunk)
+    finally:
+        # 解析出错时清空队列，让阻塞在 put 上的读取线程能放入最后一块后退出
+        done.set()
+        while not chunks.empty():
+            chunks.get_nowait()
+
+
+def _form_values(value_targets: dict[str, ValueTarget]) -> dict[str, str]:
+    """收集已提交的普通表单字段"""
+    return {
+        name: target.value.decode("utf-8") for name, target in value_targets.items() if target.value
+    }
+
+
+# 待删除的上传文件，由后台线程删除，不阻塞响应
+_cleanup_queue = queue.Queue()
+_janitor = None
+_janitor_lock = threading.Lock()
+
+
+def remove_uploads(paths) -> None:
+    """删除上传的临时文件（交给后台线程执行，忽略已不存在的文件）"""
+    global _janitor
+    with _janitor_lock:
+        if _janitor is None or not _janitor.is_alive():
+            _janitor = threading.Thread(target=_remove_loop, name="upload-janitor", daemon=True)
+            _janitor.start()
+
+    for path in paths:
+        _cleanup_queue.put(path)
+
+
+def _remove_loop() -> None:
+    while True:
+        path = _cleanup_queue.get()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
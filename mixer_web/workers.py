@@ -0,0 +1,139 @@
+"""
+混音任务执行模块
+在进程池中运行 CPU 密集的分析/混音任务，避免 librosa 计算阻塞 Web 请求线程
+"""
+
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from mixer_web.config import JOB_TIMEOUT, MIX_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Web 进程内的进程池（延迟创建）
+_pool = None
+_pool_lock = threading.Lock()
+
+# 工作进程内的 Mixer 实例
+_mixer = None
+_mixer_lock = threading.Lock()
+_warmed = False
+
+
+def get_mixer():
+    """获取当前进程的 Mixer 实例（首次调用时初始化，并发调用只初始化一次）"""
+    global _mixer
+    if _mixer is None:
+        with _mixer_lock:
+            if _mixer is None:
+                from mixer_core.mixer import Mixer
+
+                _mixer = Mixer()
+    return _mixer
+
+
+def warm_up() -> None:
+    """
+    预热当前进程：导入 librosa、创建 Mixer，并用一段合成音频跑一遍分析，
+    提前完成 numba 编译；之后 fork 出的工作进程直接继承这些状态
+    """
+    global _warmed
+    if _warmed:
+        return
+
+    import numpy as np
+
+    mixer = get_mixer()
+    rng = np.random.default_rng(0)
+    y = (rng.standard_normal(mixer.sr * 5) * 0.1).astype(np.float32)
+    mixer.extract_features(y)
+    _warmed = True
+
+
+def prewarm() -> None:
+    """在后台线程中预热 Mixer 并启动全部工作进程，避免首个请求承担冷启动开销"""
+    threading.Thread(target=_prewarm, name="mixer-prewarm", daemon=True).start()
+
+
+def _prewarm() -> None:
+    try:
+        # 预热期间持有进程池锁：进程池在预热完成后才创建，
+        # 避免在其他线程导入模块的过程中 fork
+        with _pool_lock:
+            warm_up()
+
+        pool = get_pool()
+        if pool is not None:
+            for future in [pool.submit(warm_up) for _ in range(MIX_WORKERS)]:
+                future.result()
+        logger.info("Mixer 预热完成")
+    except Exception as e:
+        logger.warning(f"Mixer 预热失败，将在首个请求时初始化: {e}")
+
+
+def _init_worker() -> None:
+    """工作进程初始化：预热失败不影响进程池，任务执行时再初始化"""
+    try:
+        warm_up()
+    except Exception as e:
+        logger.warning(f"工作进程预热失败: {e}")
+
+
+def mix_job(
+    track_a_path: str,
+    track_b_path: str,
+    strategy: str,
+    output_path: str,
+    hash_a: str | None = None,
+    hash_b: str | None = None,
+) -> dict:
+    """混音任务（在工作进程中执行）"""
+    return get_mixer().mix(
+        track_a_path,
+        track_b_path,
+        strategy=strategy,
+        output_path=output_path,
+        hash_a=hash_a,
+        hash_b=hash_b,
+    )
+
+
+def evaluate_job(
+    buf_a: bytes, buf_b: bytes, hash_a: str | None = None, hash_b: str | None = None
+) -> dict:
+    """兼容性评估任务，直接分析上传的文件数据（在工作进程中执行）"""
+    return get_mixer().evaluate_compatibility_bytes(buf_a, buf_b, hash_a, hash_b)
+
+
+def get_pool() -> ProcessPoolExecutor | None:
+    """获取进程池；运行环境不支持多进程时（如 Serverless）返回 None"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            try:
+                _pool = ProcessPoolExecutor(max_workers=MIX_WORKERS, initializer=_init_worker)
+            except (OSError, NotImplementedError) as e:
+                logger.warning(f"无法创建进程池，任务将在当前进程执行: {e}")
+                _pool = False
+    return _pool or None
+
+
+def run_job(fn, *args, **kwargs):
+    """
+    在进程池中执行任务并等待结果，当前线程等待期间不占用 GIL
+
+    进程池已满时任务排队等待，超过 JOB_TIMEOUT 仍未完成则抛出 TimeoutError
+    """
+    pool = get_pool()
+    if pool is None:
+        return fn(*args, **kwargs)
+
+    future = pool.submit(fn, *args, **kwargs)
+    try:
+        return future.result(timeout=JOB_TIMEOUT)
+    except FutureTimeoutError:
+        # 仍在排队的任务直接取消；已开始执行的无法中断，结果会被丢弃
+        future.cancel()
+        raise TimeoutError(f"任务超时（{JOB_TIMEOUT:g}s），服务繁忙请稍后重试") from None
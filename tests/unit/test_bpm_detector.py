@@ -4,6 +4,7 @@
 
 import pytest
 from mixer_core.bpm_detector import BPMDetector
+from mixer_core.fastmath import beat_confidence
 
 
 class TestBPMDetector:
@@ -34,14 +35,13 @@ class TestBPMDetector:
         # 测试 0.5x 问题
         assert 60 <= detector._post_process(40) <= 200
 
-    def test_confidence_calculation(self, detector):
+    def test_confidence_calculation(self):
         """测试置信度计算"""
         import numpy as np
 
         # 模拟稳定的节拍
-        beats = np.array([0, 0.5, 1.0, 1.5, 2.0])
-        y = np.random.randn(10000)
+        beat_times = np.array([0, 0.5, 1.0, 1.5, 2.0])
 
-        confidence = detector._calculate_confidence(y, beats)
+        confidence = beat_confidence(beat_times)
 
         assert 0 <= confidence <= 1
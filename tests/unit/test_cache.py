@@ -0,0 +1,103 @@
+"""
+单元测试 - 缓存
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from mixer_core import cache as cache_module
+from mixer_core.cache import FeatureCache, JSONCache, LRUCache, file_fingerprint
+
+
+class TestLRUCache:
+    """LRU 缓存测试"""
+
+    def test_evicts_least_recently_used(self):
+        """测试超出容量时淘汰最久未使用的条目"""
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert len(cache) == 2
+
+
+class TestDiskCaches:
+    """磁盘缓存测试"""
+
+    @pytest.fixture
+    def features(self):
+        return {
+            "y": np.random.rand(1000).astype(np.float32),
+            "bpm": 120.0,
+            "beats": np.array([0.5, 1.0, 1.5]),
+            "info": {"bpm": 120.0, "key": "Am"},
+        }
+
+    def test_json_cache_reads_from_disk(self, tmp_path):
+        """测试 JSON 缓存在新实例中可从磁盘读取"""
+        JSONCache(str(tmp_path)).put("k", {"score": 85})
+
+        assert JSONCache(str(tmp_path)).get("k") == {"score": 85}
+
+    def test_feature_cache_round_trip(self, tmp_path, features):
+        """测试特征缓存写入磁盘后可完整读回"""
+        FeatureCache(str(tmp_path)).put("k", features)
+        loaded = FeatureCache(str(tmp_path)).get("k")
+
+        assert np.array_equal(loaded["y"], features["y"])
+        assert loaded["y"].dtype == np.float32
+        assert np.array_equal(loaded["beats"], features["beats"])
+        assert loaded["bpm"] == 120.0
+        assert loaded["info"] == {"bpm": 120.0, "key": "Am"}
+
+    def test_feature_cache_miss(self, tmp_path):
+        """测试未缓存的键返回 None"""
+        assert FeatureCache(str(tmp_path)).get("missing") is None
+
+    def test_disk_size_limit_evicts_least_recently_used(self, tmp_path, features):
+        """测试磁盘缓存超出大小上限时删除最久未使用的文件"""
+        FeatureCache(str(tmp_path)).put("a", features)
+        size = os.path.getsize(tmp_path / "a.npz")
+        cache = FeatureCache(str(tmp_path), maxsize=1, max_bytes=int(size * 2.5))
+        cache.put("b", features)
+        os.utime(tmp_path / "a.npz", (0, 0))
+        os.utime(tmp_path / "b.npz", (1, 1))
+        FeatureCache(str(tmp_path)).get("a")  # 命中后成为最近使用
+        cache.put("c", features)
+
+        assert sorted(os.listdir(tmp_path)) == ["a.npz", "c.npz"]
+
+    def test_cache_path_removes_stale_versions(self, tmp_path, monkeypatch):
+        """测试首次取缓存目录时删除旧版本和未分版本的缓存目录"""
+        for name in ("features", "v0", "other"):
+            (tmp_path / name).mkdir()
+        monkeypatch.setattr(cache_module, "CACHE_DIR", str(tmp_path))
+        monkeypatch.setattr(cache_module, "CACHE_VERSION", 1)
+        monkeypatch.setattr(cache_module, "_stale_removed", False)
+
+        path = cache_module.cache_path("features", "16000")
+
+        assert path == os.path.join(str(tmp_path), "v1", "features", "16000")
+        assert sorted(os.listdir(tmp_path)) == ["other"]
+
+
+class TestFileFingerprint:
+    """文件指纹测试"""
+
+    def test_changes_with_tail_content(self, tmp_path):
+        """测试只修改文件末尾时指纹也会变化"""
+        path = tmp_path / "a.mp3"
+        data = bytearray(1024 * 1024)
+        path.write_bytes(bytes(data))
+        before = file_fingerprint(str(path))
+
+        data[-1] = 1
+        path.write_bytes(bytes(data))
+
+        assert file_fingerprint(str(path)) != before
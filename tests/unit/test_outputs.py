@@ -0,0 +1,46 @@
+"""
+单元测试 - 混音结果清理
+"""
+
+import os
+import time
+
+from mixer_web.outputs import prune_outputs
+
+
+def _write_output(folder, name: str, size: int, mtime: float) -> None:
+    for path, n in ((folder / f"{name}.mp3", size), (folder / f"{name}.mp3.meta", 10)):
+        path.write_bytes(b"\0" * n)
+        os.utime(path, (mtime, mtime))
+
+
+class TestPruneOutputs:
+    """输出目录清理测试"""
+
+    def test_evicts_oldest_outputs_with_meta(self, tmp_path):
+        """测试超出大小上限时成对删除最久未使用的 .mp3 和 .meta"""
+        now = time.time()
+        _write_output(tmp_path, "a", 1000, now - 30)
+        _write_output(tmp_path, "b", 1000, now - 20)
+        _write_output(tmp_path, "c", 1000, now - 10)
+        (tmp_path / ".tmp.mp3").write_bytes(b"\0" * 1000)
+
+        prune_outputs(str(tmp_path), max_bytes=2100, max_age=3600)
+
+        assert sorted(os.listdir(tmp_path)) == [
+            ".tmp.mp3",
+            "b.mp3",
+            "b.mp3.meta",
+            "c.mp3",
+            "c.mp3.meta",
+        ]
+
+    def test_expires_old_outputs_but_keeps_current(self, tmp_path):
+        """测试删除超过最长未使用时间的结果，刚生成的结果即使超限也保留"""
+        now = time.time()
+        _write_output(tmp_path, "old", 10, now - 7200)
+        _write_output(tmp_path, "new", 5000, now)
+
+        prune_outputs(str(tmp_path), max_bytes=100, max_age=3600, keep="new.mp3")
+
+        assert sorted(os.listdir(tmp_path)) == ["new.mp3", "new.mp3.meta"]
@@ -0,0 +1,24 @@
+"""
+单元测试 - 歌曲结构分析
+"""
+
+import numpy as np
+
+from mixer_core.segment_detector import snap_to_grid
+
+
+class TestSnapToGrid:
+    """网格对齐测试"""
+
+    def test_sides(self):
+        """测试三种对齐方式及越界时取首尾网格点"""
+        grid = np.array([1.0, 2.0, 4.0])
+        times = np.array([0.5, 2.9, 3.0, 5.0])
+
+        assert snap_to_grid(times, grid, "before").tolist() == [1.0, 2.0, 2.0, 4.0]
+        assert snap_to_grid(times, grid, "after").tolist() == [1.0, 4.0, 4.0, 4.0]
+        assert snap_to_grid(times, grid, "nearest").tolist() == [1.0, 2.0, 2.0, 4.0]
+
+    def test_empty_grid(self):
+        """测试网格为空时原样返回"""
+        assert snap_to_grid(3.0, np.array([])) == 3.0
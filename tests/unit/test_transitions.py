@@ -4,7 +4,14 @@
 
 import numpy as np
 import pytest
-from mixer_core.transition.base import CrossfadeStrategy, BeatSyncStrategy, TransitionFactory
+from mixer_core.transition.base import (
+    BeatSyncStrategy,
+    CrossfadeStrategy,
+    TransitionFactory,
+    detect_silence,
+    find_nearest_beat,
+)
+from mixer_core.transition.beat_sync import stretch_to_target_bpm
 
 
 class TestCrossfadeStrategy:
@@ -44,6 +51,85 @@ class TestCrossfadeStrategy:
         expected_min = max(len(audio_a), transition_point + (len(audio_b) - transition_point))
         assert len(result) >= expected_min - sr  # 允许一些误差
 
+    def test_crossfade_fades_a_out(self, strategy):
+        """测试过渡区内歌曲A淡出、歌曲B淡入，两端与原音频衔接"""
+        sr = 1000
+        audio_a = np.ones(5 * sr, dtype=np.float32)
+        audio_b = np.full(5 * sr, 2.0, dtype=np.float32)
+        transition_point = 3 * sr
+
+        result = strategy.apply(audio_a, audio_b, sr, transition_point)
+
+        fade_start = transition_point - sr
+        assert result[fade_start - 1] == pytest.approx(1.0)
+        assert result[fade_start] == pytest.approx(1.0)
+        assert result[transition_point - 1] == pytest.approx(2.0, abs=1e-3)
+        assert result[transition_point] == pytest.approx(2.0)
+
+    def test_crossfade_skips_leading_silence(self, strategy):
+        """测试歌曲B开头的静音被跳过，不淡入静音"""
+        sr = 16000
+        audio_a = np.zeros(5 * sr, dtype=np.float32)
+        audio_b = np.sin(2 * np.pi * 440 * np.arange(5 * sr) / sr).astype(np.float32)
+        audio_b[:sr] = 0
+        transition_point = 3 * sr
+
+        result = strategy.apply(audio_a, audio_b, sr, transition_point)
+        no_skip = CrossfadeStrategy(fade_duration=1.0, skip_silence=False).apply(
+            audio_a, audio_b, sr, transition_point
+        )
+
+        fade = slice(transition_point - sr, transition_point)
+        assert np.abs(no_skip[fade]).max() == 0
+        assert np.abs(result[fade]).max() > 0.5
+        assert len(result) < len(no_skip)
+
+
+class TestDetectSilence:
+    """静音检测测试"""
+
+    def test_seek_step_matches_full_scan(self):
+        """测试粗扫步长不改变较长静音段的检测结果"""
+        sr = 16000
+        audio = np.sin(2 * np.pi * 440 * np.arange(sr * 10) / sr).astype(np.float32)
+        audio[sr * 2 : sr * 3] = 0
+        audio[-sr:] = 0
+
+        segments = detect_silence(audio, sr)
+
+        assert len(segments) == 2
+        assert segments[-1][1] == len(audio)
+        assert detect_silence(audio, sr, seek_step=8) == segments
+
+
+class TestFindNearestBeat:
+    """节拍对齐测试"""
+
+    def test_sparse_beats(self):
+        """测试节拍稀疏时仍对齐到最近的节拍，而不是最后一拍"""
+        sr = 16000
+        beats = np.array([100.0, 150.0, 200.0])
+
+        assert find_nearest_beat(int(140 * sr), beats, sr) == 150 * sr
+        assert find_nearest_beat(int(125 * sr), beats, sr) == 100 * sr
+
+
+class TestTimeStretch:
+    """时间拉伸测试"""
+
+    def test_stretch_length_and_phase(self):
+        """测试拉伸后的时长，且纯音拉伸后频率不变"""
+        sr = 16000
+        audio = np.sin(2 * np.pi * 440 * np.arange(sr * 4) / sr).astype(np.float32)
+
+        stretched, ratio = stretch_to_target_bpm(audio, sr, 110.0, 100.0)
+
+        assert ratio == pytest.approx(1.1)
+        assert len(stretched) == round(len(audio) / 1.1)
+        assert stretched.dtype == np.float32
+        spectrum = np.abs(np.fft.rfft(stretched[sr : 3 * sr]))
+        assert np.argmax(spectrum) * sr / (2 * sr) == pytest.approx(440, abs=1)
+
 
 class TestTransitionFactory:
     """过渡策略工厂测试"""